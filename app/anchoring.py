@@ -0,0 +1,492 @@
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, ReadSessionLocal
+from app.models import AnchorQueue, AnchorBatch, Certificate
+from app.merkle import build_merkle_tree, merkle_root, merkle_proof
+from app.stats import record_anchored
+from app.snapshot import record_snapshot_change
+from app.blockchain import (
+    send_certificate_transaction,
+    get_transaction_status,
+    get_confirmed_nonce,
+    rebroadcast_transaction,
+    fill_nonce_gap,
+    verify_certificate_on_chain,
+    remember_anchored,
+    chain_available
+)
+from app.metrics import ANCHOR_QUEUE_DEPTH
+
+
+# ===============================
+# CONFIGURATION
+# ===============================
+
+# single : satu transaksi storeCertificate per sertifikat
+# batch  : hash dikumpulkan, hanya Merkle root yang disimpan on-chain
+ANCHOR_MODE = os.getenv("ANCHOR_MODE", "single").lower()
+
+ANCHOR_POLL_INTERVAL = float(os.getenv("ANCHOR_POLL_INTERVAL", "5"))
+ANCHOR_MAX_ATTEMPTS = int(os.getenv("ANCHOR_MAX_ATTEMPTS", "5"))
+ANCHOR_BATCH_LIMIT = int(os.getenv("ANCHOR_BATCH_LIMIT", "20"))
+
+# Baris SUBMITTING yang tertinggal (mis. proses mati saat mengirim)
+# dikembalikan ke PENDING setelah timeout ini.
+ANCHOR_CLAIM_TIMEOUT = int(os.getenv("ANCHOR_CLAIM_TIMEOUT", "120"))
+
+# Receipt tidak ditunggu (dicek sekali per putaran). Transaksi SUBMITTED
+# yang belum mined lewat batas ini dianggap macet / di-drop: dikirim
+# ulang dengan nonce yang SAMA (tidak mungkin mined dua kali), dan
+# nonce bolong di bawahnya diisi (lihat recover_stuck_nonces).
+ANCHOR_RECEIPT_TIMEOUT = int(os.getenv("ANCHOR_RECEIPT_TIMEOUT", "600"))
+
+# Mode batch: root di-anchor jika jumlah hash mencapai SIZE
+# atau hash tertua sudah menunggu lebih dari WINDOW detik.
+ANCHOR_BATCH_SIZE = int(os.getenv("ANCHOR_BATCH_SIZE", "1024"))
+ANCHOR_BATCH_WINDOW = int(os.getenv("ANCHOR_BATCH_WINDOW", "300"))
+
+
+# ===============================
+# ENQUEUE
+# ===============================
+
+def enqueue_anchor(db: Session, certificate_hash: str):
+    """
+    Masukkan hash ke outbox anchoring.
+    Tidak melakukan commit: dipanggil di transaksi yang sama
+    dengan insert Certificate agar keduanya atomik.
+    """
+    db.add(AnchorQueue(certificate_hash=certificate_hash))
+
+
+# ===============================
+# HELPERS
+# ===============================
+
+def _anchor_value(item) -> str:
+    """String yang benar-benar disimpan ke smart contract."""
+    if isinstance(item, AnchorBatch):
+        return item.merkle_root
+
+    return item.certificate_hash
+
+
+def _certificate_hashes(db: Session, item) -> list:
+    if isinstance(item, AnchorBatch):
+        rows = db.query(AnchorQueue.certificate_hash).filter(
+            AnchorQueue.batch_id == item.id
+        ).all()
+        return [row[0] for row in rows]
+
+    return [item.certificate_hash]
+
+
+def _set_status(db: Session, item, status: str, tx_hash=None):
+    item.status = status
+
+    if status == "CONFIRMED":
+        remember_anchored(_anchor_value(item))
+
+    hashes = _certificate_hashes(db, item)
+
+    if isinstance(item, AnchorBatch) and status in ("CONFIRMED", "FAILED"):
+        db.query(AnchorQueue).filter(
+            AnchorQueue.batch_id == item.id
+        ).update({"status": status}, synchronize_session=False)
+
+    if status == "CONFIRMED":
+        newly_anchored = db.query(Certificate).filter(
+            Certificate.certificate_hash.in_(hashes),
+            Certificate.anchor_status != "CONFIRMED"
+        ).all()
+        record_anchored(db, newly_anchored)
+        record_snapshot_change(
+            db, "add", [cert.certificate_hash for cert in newly_anchored]
+        )
+
+    values = {"anchor_status": status}
+
+    if tx_hash:
+        values["blockchain_tx"] = tx_hash
+
+    db.query(Certificate).filter(
+        Certificate.certificate_hash.in_(hashes)
+    ).update(values, synchronize_session=False)
+
+
+def _claim(db: Session, model, item) -> bool:
+    """
+    Klaim baris PENDING secara atomik supaya beberapa worker
+    (mis. beberapa proses uvicorn) tidak mengirim hash yang sama.
+    """
+    claimed = (
+        db.query(model)
+        .filter(model.id == item.id, model.status == "PENDING")
+        .update({"status": "SUBMITTING", "updated_at": datetime.utcnow()})
+    )
+    db.commit()
+
+    return claimed == 1
+
+
+def _record_failure(db: Session, item, error: str):
+    item.attempts = (item.attempts or 0) + 1
+    item.last_error = error[:255]
+
+    if item.attempts >= ANCHOR_MAX_ATTEMPTS:
+        _set_status(db, item, "FAILED")
+    else:
+        _set_status(db, item, "PENDING")
+
+
+# ===============================
+# BUILD MERKLE BATCH
+# ===============================
+
+def build_pending_batch(db: Session):
+    """
+    Kumpulkan hash PENDING menjadi satu AnchorBatch jika ukuran
+    atau jendela waktu batch sudah terpenuhi.
+    """
+    pending = (
+        db.query(AnchorQueue)
+        .filter(
+            AnchorQueue.status == "PENDING",
+            AnchorQueue.batch_id.is_(None)
+        )
+        .order_by(AnchorQueue.id)
+        .limit(ANCHOR_BATCH_SIZE)
+        .all()
+    )
+
+    if not pending:
+        return None
+
+    window_start = datetime.utcnow() - timedelta(seconds=ANCHOR_BATCH_WINDOW)
+
+    if len(pending) < ANCHOR_BATCH_SIZE and pending[0].created_at > window_start:
+        return None
+
+    ids = [item.id for item in pending]
+
+    claimed = (
+        db.query(AnchorQueue)
+        .filter(AnchorQueue.id.in_(ids), AnchorQueue.status == "PENDING")
+        .update({"status": "BATCHED"}, synchronize_session=False)
+    )
+
+    if claimed != len(ids):
+        # Worker lain sedang membangun batch dari baris yang sama
+        db.rollback()
+        return None
+
+    hashes = [item.certificate_hash for item in pending]
+    levels = build_merkle_tree(hashes)
+    root = merkle_root(levels)
+
+    batch = AnchorBatch(merkle_root=root, leaf_count=len(hashes))
+    db.add(batch)
+    db.flush()
+
+    db.query(AnchorQueue).filter(
+        AnchorQueue.id.in_(ids)
+    ).update({"batch_id": batch.id}, synchronize_session=False)
+
+    certificates = db.query(Certificate).filter(
+        Certificate.certificate_hash.in_(hashes)
+    ).all()
+    index_by_hash = {h: i for i, h in enumerate(hashes)}
+
+    for cert in certificates:
+        cert.merkle_root = root
+        cert.merkle_proof = json.dumps(
+            merkle_proof(levels, index_by_hash[cert.certificate_hash])
+        )
+
+    db.commit()
+
+    print(f"MERKLE BATCH {batch.id}: {len(hashes)} hash, root {root}")
+
+    return batch
+
+
+# ===============================
+# SUBMIT PENDING
+# ===============================
+
+def submit_pending(db: Session):
+    model = AnchorBatch if ANCHOR_MODE == "batch" else AnchorQueue
+
+    stale_before = datetime.utcnow() - timedelta(seconds=ANCHOR_CLAIM_TIMEOUT)
+
+    for stale_model in (AnchorQueue, AnchorBatch):
+        (
+            db.query(stale_model)
+            .filter(
+                stale_model.status == "SUBMITTING",
+                stale_model.updated_at < stale_before
+            )
+            .update({"status": "PENDING"})
+        )
+    db.commit()
+
+    if ANCHOR_MODE == "batch":
+        build_pending_batch(db)
+
+    query = db.query(model).filter(model.status == "PENDING")
+
+    if model is AnchorQueue:
+        query = query.filter(AnchorQueue.batch_id.is_(None))
+
+    pending = query.order_by(model.id).limit(ANCHOR_BATCH_LIMIT).all()
+
+    for item in pending:
+        if not _claim(db, model, item):
+            continue
+
+        db.refresh(item)
+
+        try:
+            tx_hash, nonce = send_certificate_transaction(_anchor_value(item))
+        except Exception as e:
+            print("ANCHOR SUBMIT ERROR:", str(e))
+            _record_failure(db, item, str(e))
+            db.commit()
+            continue
+
+        item.tx_hash = tx_hash
+        item.nonce = nonce
+        item.submitted_at = datetime.utcnow()
+        _set_status(db, item, "SUBMITTED")
+        db.commit()
+
+
+# ===============================
+# CONFIRM SUBMITTED
+# ===============================
+
+def confirm_submitted(db: Session):
+    confirmed_nonce = None
+
+    for model in (AnchorQueue, AnchorBatch):
+        submitted = (
+            db.query(model)
+            .filter(model.status == "SUBMITTED")
+            .order_by(model.id)
+            .limit(ANCHOR_BATCH_LIMIT)
+            .all()
+        )
+
+        for item in submitted:
+            # Nonce dibaca SEBELUM receipt: jika nonce sudah terpakai dan
+            # receipt tetap kosong, transaksi ini pasti tidak akan mined.
+            if confirmed_nonce is None:
+                try:
+                    confirmed_nonce = get_confirmed_nonce()
+                except Exception as e:
+                    print("ANCHOR NONCE ERROR:", str(e))
+                    confirmed_nonce = -1
+
+            try:
+                status = get_transaction_status(item.tx_hash)
+            except Exception as e:
+                print("ANCHOR RECEIPT ERROR:", str(e))
+                continue
+
+            if status is None:
+                if item.nonce is None or confirmed_nonce <= item.nonce:
+                    continue
+
+                # Nonce sudah terpakai transaksi lain tapi receipt tidak ada:
+                # transaksi ini diganti (replaced) / di-drop.
+                anchored = verify_certificate_on_chain(_anchor_value(item), use_cache=False)
+
+                if anchored is None:
+                    # Chain tidak tersedia, cek lagi di putaran berikutnya
+                    continue
+
+                if anchored:
+                    _set_status(db, item, "CONFIRMED")
+                else:
+                    _record_failure(db, item, f"Transaksi diganti: {item.tx_hash}")
+
+                db.commit()
+                continue
+
+            if status:
+                _set_status(db, item, "CONFIRMED", item.tx_hash)
+                db.commit()
+                continue
+
+            anchored = verify_certificate_on_chain(_anchor_value(item), use_cache=False)
+
+            if anchored is None:
+                continue
+
+            if anchored:
+                # Revert karena hash sudah tersimpan (mis. dikirim ulang setelah restart)
+                _set_status(db, item, "CONFIRMED")
+            else:
+                _record_failure(db, item, f"Transaksi revert: {item.tx_hash}")
+
+            db.commit()
+
+
+# ===============================
+# NONCE GAP RECOVERY
+# ===============================
+
+def recover_stuck_nonces(db: Session):
+    """
+    Transaksi wallet mined berurutan per nonce: satu nonce yang tidak
+    pernah sampai ke chain (kirim gagal setelah alokasi lain, RPC mati
+    saat resync, transaksi di-drop mempool) menahan semua transaksi
+    sesudahnya.
+
+    Jika ada SUBMITTED yang belum mined lewat ANCHOR_RECEIPT_TIMEOUT,
+    setiap nonce dari nonce confirmed ("latest") sampai nonce item macet
+    tertinggi diperiksa: item SUBMITTED yang macet dikirim ulang dengan
+    nonce yang sama, nonce tanpa item diisi transaksi kosong.
+    """
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=ANCHOR_RECEIPT_TIMEOUT)
+
+    submitted = []
+
+    for model in (AnchorQueue, AnchorBatch):
+        submitted.extend(
+            db.query(model)
+            .filter(model.status == "SUBMITTED", model.nonce.isnot(None))
+            .all()
+        )
+
+    def is_stale(item) -> bool:
+        return item.submitted_at is None or item.submitted_at < stale_before
+
+    if not any(is_stale(item) for item in submitted):
+        return
+
+    confirmed_nonce = get_confirmed_nonce()
+    stale = [item for item in submitted if is_stale(item) and item.nonce >= confirmed_nonce]
+
+    if not stale:
+        return
+
+    by_nonce = {item.nonce: item for item in submitted}
+    highest = max(item.nonce for item in stale)
+
+    for nonce in range(confirmed_nonce, min(highest + 1, confirmed_nonce + ANCHOR_BATCH_LIMIT)):
+        item = by_nonce.get(nonce)
+
+        if item is not None and not is_stale(item):
+            continue
+
+        try:
+            if item is None:
+                tx_hash = fill_nonce_gap(nonce)
+                print(f"ANCHOR NONCE GAP: nonce {nonce} diisi ({tx_hash})")
+                continue
+
+            tx_hash = rebroadcast_transaction(_anchor_value(item), nonce)
+        except Exception as e:
+            print(f"ANCHOR REBROADCAST ERROR (nonce {nonce}):", str(e))
+            continue
+
+        print(f"ANCHOR REBROADCAST: nonce {nonce} {item.tx_hash} -> {tx_hash}")
+
+        # Jika transaksi lama yang akhirnya mined, confirm_submitted
+        # menanganinya lewat jalur "nonce sudah terpakai"
+        item.tx_hash = tx_hash
+        item.submitted_at = now
+        item.last_error = f"Dikirim ulang (nonce {nonce})"
+        db.commit()
+
+
+def process_anchor_queue():
+    # RPC sedang tidak tersedia: jangan habiskan jatah attempts
+    if not chain_available():
+        return
+
+    db = SessionLocal()
+
+    try:
+        confirm_submitted(db)
+        recover_stuck_nonces(db)
+        submit_pending(db)
+    except Exception as e:
+        db.rollback()
+        print("ANCHOR WORKER ERROR:", str(e))
+    finally:
+        db.close()
+
+
+# ===============================
+# QUEUE DEPTH (METRICS)
+# ===============================
+
+ACTIVE_STATUSES = ("PENDING", "SUBMITTING", "SUBMITTED", "BATCHED")
+
+
+def queue_depth() -> dict:
+    """Jumlah item AnchorQueue yang belum final, per status."""
+    db = ReadSessionLocal()
+
+    try:
+        rows = (
+            db.query(AnchorQueue.status, func.count(AnchorQueue.id))
+            .filter(AnchorQueue.status.in_(ACTIVE_STATUSES))
+            .group_by(AnchorQueue.status)
+            .all()
+        )
+    finally:
+        db.close()
+
+    depth = {(status,): 0 for status in ACTIVE_STATUSES}
+    depth.update({(status,): count for status, count in rows})
+
+    return depth
+
+
+ANCHOR_QUEUE_DEPTH.set_function(queue_depth)
+
+
+# ===============================
+# BACKGROUND WORKER
+# ===============================
+
+_stop_event = threading.Event()
+_worker_thread = None
+
+
+def _worker_loop():
+    while not _stop_event.is_set():
+        process_anchor_queue()
+        _stop_event.wait(ANCHOR_POLL_INTERVAL)
+
+
+def start_anchor_worker():
+    global _worker_thread
+
+    if _worker_thread and _worker_thread.is_alive():
+        return
+
+    _stop_event.clear()
+    _worker_thread = threading.Thread(
+        target=_worker_loop,
+        name="anchor-worker",
+        daemon=True
+    )
+    _worker_thread.start()
+
+
+def stop_anchor_worker():
+    _stop_event.set()
+
+    if _worker_thread:
+        _worker_thread.join(timeout=ANCHOR_POLL_INTERVAL + 5)
@@ -1,15 +1,193 @@
+import os
+import time
+import queue
+import threading
+from datetime import datetime
+
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+
 from app.database import SessionLocal
 from app.models import AuditLog
+from app.metrics import AUDIT_WRITE_DURATION, AUDIT_WRITTEN, AUDIT_QUEUE_DEPTH
+
+
+# ==========================================================
+# CONFIGURATION
+# ==========================================================
+
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_FLUSH_SIZE = int(os.getenv("AUDIT_FLUSH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1"))
+
+# Berapa lama request menunggu saat queue penuh sebelum menulis sendiri
+AUDIT_PUT_TIMEOUT = float(os.getenv("AUDIT_PUT_TIMEOUT", "5"))
+
+
+# ==========================================================
+# WRITE-BEHIND AUDIT SINK
+# ==========================================================
+
+class AuditSink:
+    """
+    Audit log ditampung di queue in-memory lalu ditulis dengan bulk
+    insert oleh thread background (saat jumlah mencapai flush_size
+    atau flush_interval terlewati).
+
+    Queue dibatasi: jika penuh, pemanggil menunggu (backpressure) dan
+    setelah put_timeout menulis langsung ke database. Jika sink belum
+    dijalankan (mis. script CLI), entry juga langsung ditulis.
+    """
+
+    def __init__(self, max_size: int, flush_size: int, flush_interval: float, put_timeout: float):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_size)
+        self._stop_event = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread = None
+
+    # ---------- producer ----------
+
+    def put(self, entry: dict):
+        if not self.running:
+            self._write([entry])
+            return
+
+        try:
+            self._queue.put(entry, timeout=self.put_timeout)
+        except queue.Full:
+            print("AUDIT QUEUE PENUH: menulis langsung")
+            self._write([entry])
+
+    async def put_async(self, entry: dict):
+        try:
+            if self.running:
+                self._queue.put_nowait(entry)
+                return
+        except queue.Full:
+            pass
+
+        # Queue penuh / sink mati: jangan blok event loop
+        await run_in_threadpool(self.put, entry)
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    # ---------- consumer ----------
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _collect(self) -> list:
+        batch = []
+        deadline = None
+
+        while len(batch) < self.flush_size:
+            if deadline is None:
+                timeout = self.flush_interval
+            else:
+                timeout = deadline - time.monotonic()
+
+                if timeout <= 0:
+                    break
+
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+
+        return batch
+
+    def _write(self, entries: list):
+        for attempt in range(3):
+            db = SessionLocal()
+
+            try:
+                with self._write_lock, AUDIT_WRITE_DURATION.time():
+                    db.execute(insert(AuditLog), entries)
+                    db.commit()
+
+                AUDIT_WRITTEN.inc(len(entries))
+                return
+            except Exception as e:
+                db.rollback()
+                print("AUDIT FLUSH ERROR:", str(e))
+                time.sleep(0.5 * (attempt + 1))
+            finally:
+                db.close()
+
+        print(f"AUDIT FLUSH GAGAL: {len(entries)} entry dibuang")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            batch = self._collect()
+
+            if batch:
+                self._write(batch)
+
+        self.flush()
+
+    def flush(self):
+        entries = []
+
+        while True:
+            try:
+                entries.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        for start in range(0, len(entries), self.flush_size):
+            self._write(entries[start:start + self.flush_size])
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        if self.running:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="audit-sink",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 10)
+            self._thread = None
+
+        self.flush()
+
+
+audit_sink = AuditSink(
+    max_size=AUDIT_QUEUE_SIZE,
+    flush_size=AUDIT_FLUSH_SIZE,
+    flush_interval=AUDIT_FLUSH_INTERVAL,
+    put_timeout=AUDIT_PUT_TIMEOUT
+)
+
+AUDIT_QUEUE_DEPTH.set_function(audit_sink.qsize)
+
 
-def log_action(admin_id: int, action: str, description: str):
-    db = SessionLocal()
+def build_audit_entry(admin_id, action: str, description: str = "", ip_address: str = None) -> dict:
+    return {
+        "admin_id": admin_id,
+        "action": action,
+        "description": description,
+        "ip_address": ip_address,
+        "created_at": datetime.utcnow()
+    }
 
-    log = AuditLog(
-        admin_id=admin_id,
-        action=action,
-        description=description
-    )
 
-    db.add(log)
-    db.commit()
-    db.close()
\ No newline at end of file
+def log_action(admin_id: int, action: str, description: str, ip_address: str = None):
+    audit_sink.put(build_audit_entry(admin_id, action, description, ip_address))
@@ -0,0 +1,330 @@
+import os
+import re
+import sys
+import gzip
+import json
+import threading
+from datetime import datetime, timedelta
+from collections import Counter
+
+from sqlalchemy import func, or_, and_
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.database import SessionLocal
+from app.models import AuditLog, AuditRollup
+from app.certificate_renderer import PROJECT_ROOT
+from app.metrics import AUDIT_ARCHIVED
+
+
+# ==========================================================
+# CONFIGURATION
+# ==========================================================
+# Audit log lama dipindahkan dari tabel audit_logs ke segmen JSONL
+# terkompresi (gzip) di AUDIT_ARCHIVE_DIR, sehingga tabel tetap kecil.
+# Entry action di AUDIT_ROLLUP_ACTIONS (default VERIFY_API) juga
+# diringkas ke tabel audit_rollups: jumlah per hari, per hash, per IP.
+#
+# AUDIT_ROLLUP_AFTER_DAYS : umur entry rollup (VERIFY_API) di tabel
+# AUDIT_RETENTION_DAYS    : umur entry lain (LOGIN, REVOKE, ...);
+#                           0 = tidak pernah diarsipkan
+# Batas umur dihitung per hari penuh (tengah malam UTC).
+
+AUDIT_RETENTION_ENABLED = os.getenv("AUDIT_RETENTION_ENABLED", "true").lower() in ("1", "true", "yes")
+
+AUDIT_ROLLUP_ACTIONS = tuple(
+    action.strip()
+    for action in os.getenv("AUDIT_ROLLUP_ACTIONS", "VERIFY_API").split(",")
+    if action.strip()
+)
+AUDIT_ROLLUP_AFTER_DAYS = int(os.getenv("AUDIT_ROLLUP_AFTER_DAYS", "7"))
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "90"))
+
+AUDIT_ARCHIVE_DIR = os.getenv("AUDIT_ARCHIVE_DIR", os.path.join(PROJECT_ROOT, "audit_archive"))
+
+# Jumlah entry maksimum per segmen (dan per transaksi delete)
+AUDIT_ARCHIVE_BATCH = int(os.getenv("AUDIT_ARCHIVE_BATCH", "50000"))
+
+AUDIT_RETENTION_INTERVAL = float(os.getenv("AUDIT_RETENTION_INTERVAL", "3600"))
+
+ALL_KEY = "*"
+
+# Deskripsi entry /verify tunggal (lihat app/main.py)
+VERIFY_HASH_PATTERN = re.compile(r"Verify hash: ([0-9a-f]{64})")
+
+SEGMENT_PATTERN = re.compile(r"audit-(\d{4}-\d{2}-\d{2})-(\d+)-(\d+)\.jsonl\.gz")
+
+
+def ensure_audit_indexes(engine):
+    """
+    create_all tidak menambah index ke tabel yang sudah ada; buat index
+    audit_logs yang belum ada (database lama).
+    """
+    for index in AuditLog.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+
+# ==========================================================
+# ROLLUP
+# ==========================================================
+
+def _rollup_counts(rows: list) -> Counter:
+    counts = Counter()
+
+    for row in rows:
+        if row.action not in AUDIT_ROLLUP_ACTIONS:
+            continue
+
+        day = row.created_at.strftime("%Y-%m-%d")
+
+        counts[(row.action, day, "all", ALL_KEY)] += 1
+        counts[(row.action, day, "ip", row.ip_address or "")] += 1
+
+        match = VERIFY_HASH_PATTERN.fullmatch(row.description or "")
+
+        if match:
+            counts[(row.action, day, "hash", match.group(1))] += 1
+
+    return counts
+
+
+def _store_rollups(db: Session, counts: Counter, chunk_size: int = 500):
+    items = list(counts.items())
+
+    for start in range(0, len(items), chunk_size):
+        stmt = sqlite_insert(AuditRollup).values([
+            {"action": action, "day": day, "scope": scope, "key": key, "count": count}
+            for (action, day, scope, key), count in items[start:start + chunk_size]
+        ])
+
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["action", "day", "scope", "key"],
+            set_={"count": AuditRollup.count + stmt.excluded.count}
+        ))
+
+
+# ==========================================================
+# ARCHIVE SEGMENTS
+# ==========================================================
+
+def _serialize(row: AuditLog) -> dict:
+    return {
+        "id": row.id,
+        "admin_id": row.admin_id,
+        "action": row.action,
+        "description": row.description,
+        "ip_address": row.ip_address,
+        "created_at": row.created_at.isoformat()
+    }
+
+
+def _write_segment(day: str, rows: list) -> str:
+    """
+    Tulis segmen audit-<hari>-<id pertama>-<id terakhir>.jsonl.gz.
+    Nama & isi deterministik: jika delete gagal, putaran berikutnya
+    menimpa segmen yang sama.
+    """
+    directory = os.path.join(AUDIT_ARCHIVE_DIR, day[:7])
+    os.makedirs(directory, exist_ok=True)
+
+    path = os.path.join(directory, f"audit-{day}-{rows[0].id}-{rows[-1].id}.jsonl.gz")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    with open(tmp_path, "wb") as f:
+        with gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as gz:
+            for row in rows:
+                gz.write(json.dumps(_serialize(row), ensure_ascii=False).encode() + b"\n")
+
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+    return path
+
+
+def iter_archive(start: str = None, end: str = None):
+    """Entry arsip (dict) hari start..end (YYYY-MM-DD, inklusif), urut id."""
+    if not os.path.isdir(AUDIT_ARCHIVE_DIR):
+        return
+
+    segments = []
+
+    for root, _, files in os.walk(AUDIT_ARCHIVE_DIR):
+        for name in files:
+            match = SEGMENT_PATTERN.fullmatch(name)
+
+            if not match:
+                continue
+
+            day = match.group(1)
+
+            if (start and day < start) or (end and day > end):
+                continue
+
+            segments.append((int(match.group(2)), os.path.join(root, name)))
+
+    for _, path in sorted(segments):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+# ==========================================================
+# RETENTION
+# ==========================================================
+
+def _eligible(now: datetime):
+    """Filter entry yang sudah melewati umur simpan di tabel."""
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    conditions = []
+
+    if AUDIT_ROLLUP_ACTIONS:
+        conditions.append(and_(
+            AuditLog.action.in_(AUDIT_ROLLUP_ACTIONS),
+            AuditLog.created_at < today - timedelta(days=AUDIT_ROLLUP_AFTER_DAYS)
+        ))
+
+    if AUDIT_RETENTION_DAYS > 0:
+        conditions.append(
+            AuditLog.created_at < today - timedelta(days=AUDIT_RETENTION_DAYS)
+        )
+
+    return or_(*conditions) if conditions else None
+
+
+def archive_once(now: datetime = None) -> int:
+    """
+    Arsipkan semua entry yang melewati umur simpan. Return jumlah entry
+    yang dipindahkan dari audit_logs.
+
+    Per batch (satu hari, maksimal AUDIT_ARCHIVE_BATCH entry): segmen
+    ditulis dulu, lalu rollup + delete dalam satu transaksi. Jika worker
+    lain sudah memindahkan batch yang sama, jumlah baris yang terhapus
+    tidak cocok dan transaksi di-rollback (rollup tidak terhitung dua kali).
+    """
+    eligible = _eligible(now or datetime.utcnow())
+
+    if eligible is None:
+        return 0
+
+    db = SessionLocal()
+    archived = 0
+
+    try:
+        while True:
+            oldest = db.query(func.min(AuditLog.created_at)).filter(eligible).scalar()
+
+            if oldest is None:
+                break
+
+            day_start = oldest.replace(hour=0, minute=0, second=0, microsecond=0)
+            in_day = and_(
+                eligible,
+                AuditLog.created_at >= day_start,
+                AuditLog.created_at < day_start + timedelta(days=1)
+            )
+
+            rows = (
+                db.query(AuditLog)
+                .filter(in_day)
+                .order_by(AuditLog.id)
+                .limit(AUDIT_ARCHIVE_BATCH)
+                .all()
+            )
+
+            _write_segment(day_start.strftime("%Y-%m-%d"), rows)
+
+            _store_rollups(db, _rollup_counts(rows))
+
+            deleted = db.query(AuditLog).filter(
+                in_day,
+                AuditLog.id <= rows[-1].id
+            ).delete(synchronize_session=False)
+
+            if deleted != len(rows):
+                db.rollback()
+                print("AUDIT RETENTION: batch sudah diproses worker lain")
+                break
+
+            db.commit()
+            db.expunge_all()
+
+            archived += deleted
+            AUDIT_ARCHIVED.inc(deleted)
+
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return archived
+
+
+# ==========================================================
+# BACKGROUND WORKER
+# ==========================================================
+
+_stop_event = threading.Event()
+_worker_thread = None
+
+
+def _worker_loop():
+    while not _stop_event.is_set():
+        try:
+            archived = archive_once()
+
+            if archived:
+                print(f"AUDIT RETENTION: {archived} entry diarsipkan")
+        except Exception as e:
+            print("AUDIT RETENTION ERROR:", str(e))
+
+        _stop_event.wait(AUDIT_RETENTION_INTERVAL)
+
+
+def start_audit_retention():
+    global _worker_thread
+
+    if not AUDIT_RETENTION_ENABLED:
+        return
+
+    if _worker_thread and _worker_thread.is_alive():
+        return
+
+    _stop_event.clear()
+    _worker_thread = threading.Thread(
+        target=_worker_loop,
+        name="audit-retention",
+        daemon=True
+    )
+    _worker_thread.start()
+
+
+def stop_audit_retention():
+    _stop_event.set()
+
+    if _worker_thread:
+        _worker_thread.join(timeout=60)
+
+
+# python -m app.audit_retention run
+# python -m app.audit_retention cat 2026-01-01 [2026-01-31]
+if __name__ == "__main__":
+    command = sys.argv[1:2]
+
+    if command == ["run"] and len(sys.argv) == 2:
+        print(f"{archive_once()} entry diarsipkan ke {AUDIT_ARCHIVE_DIR}")
+
+    elif command == ["cat"] and len(sys.argv) in (3, 4):
+        start = sys.argv[2]
+        end = sys.argv[3] if len(sys.argv) == 4 else start
+
+        for entry in iter_archive(start, end):
+            print(json.dumps(entry, ensure_ascii=False))
+
+    else:
+        print("Usage: python -m app.audit_retention run")
+        print("       python -m app.audit_retention cat <YYYY-MM-DD> [<YYYY-MM-DD>]")
+        sys.exit(1)
@@ -2,10 +2,11 @@ from fastapi import Request, HTTPException
 from fastapi.responses import RedirectResponse
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
-from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import SessionLocal
-from app.models import AdminUser, AuditLog
+from app.models import AdminUser
+from app.audit import audit_sink, build_audit_entry
 
 
 # ==========================================================
@@ -118,6 +119,8 @@ def role_required(allowed_roles: list):
 # ==========================================================
 # AUDIT LOG CREATOR
 # ==========================================================
+# Entry dikirim ke audit_sink (write-behind, lihat app/audit.py).
+# Parameter `db` dipertahankan agar pemanggil lama tidak berubah.
 
 def create_audit_log(
     db: Session,
@@ -126,13 +129,18 @@ def create_audit_log(
     description: str = "",
     ip_address: str = None
 ):
-    log = AuditLog(
-        admin_id=admin_id,
-        action=action,
-        description=description,
-        ip_address=ip_address,
-        created_at=datetime.utcnow()
+    audit_sink.put(
+        build_audit_entry(admin_id, action, description, ip_address)
     )
 
-    db.add(log)
-    db.commit()
\ No newline at end of file
+
+async def create_audit_log_async(
+    db: AsyncSession,
+    admin_id: int,
+    action: str,
+    description: str = "",
+    ip_address: str = None
+):
+    await audit_sink.put_async(
+        build_audit_entry(admin_id, action, description, ip_address)
+    )
@@ -1,116 +1,310 @@
 import os
-from web3 import Web3
-from dotenv import load_dotenv
+import threading
+from datetime import datetime
 
-# =============================
-# LOAD ENVIRONMENT VARIABLES
-# =============================
-load_dotenv()
+from app.cache import TTLCache
+from app.ledger import get_ledger
+from app.metrics import (
+    timed,
+    RPC_DURATION,
+    RPC_ERRORS,
+    VERIFY_CACHE_REQUESTS,
+    VERIFY_CACHE_HIT_RATIO
+)
 
-PRIVATE_KEY = os.getenv("PRIVATE_KEY")
-WALLET_ADDRESS = os.getenv("WALLET_ADDRESS")
-CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
-RPC_URL = os.getenv("RPC_URL")
 
 # =============================
-# VALIDATION
+# CONFIGURATION
 # =============================
-if not PRIVATE_KEY:
-    raise ValueError("PRIVATE_KEY tidak ditemukan di .env")
+# Akses chain lewat ledger aktif (app/ledger.py, LEDGER_BACKEND).
+# Modul ini menambahkan cache verifikasi, health probe dan mode
+# DB-only di atasnya; modul lain cukup memakai fungsi di sini.
+
+# Interval health probe RPC (detik)
+RPC_HEALTH_INTERVAL = float(os.getenv("RPC_HEALTH_INTERVAL", "15"))
+
+
+async def close_async_client():
+    await get_ledger().close_async()
 
-if not WALLET_ADDRESS:
-    raise ValueError("WALLET_ADDRESS tidak ditemukan di .env")
 
-if not CONTRACT_ADDRESS:
-    raise ValueError("CONTRACT_ADDRESS tidak ditemukan di .env")
+def _rpc(method: str):
+    """Context manager: catat durasi & error panggilan ledger per method."""
+    return timed(RPC_DURATION, RPC_ERRORS, backend=get_ledger().name, method=method)
 
-if not RPC_URL:
-    raise ValueError("RPC_URL tidak ditemukan di .env")
 
 # =============================
-# WEB3 CONNECTION
+# HEALTH PROBE
 # =============================
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
+# Thread latar belakang mengecek block number secara berkala.
+# Selama chain tidak tersedia, verifikasi tidak memanggil RPC sama
+# sekali (mode DB-only) dan anchor worker menunda pengiriman.
+chain_health = {
+    "available": None,      # None = belum pernah dicek
+    "block_number": None,
+    "checked_at": None,
+    "error": None
+}
+
+
+def mark_chain_available(block_number=None):
+    chain_health["available"] = True
+    chain_health["error"] = None
+
+    if block_number is not None:
+        chain_health["block_number"] = block_number
+        chain_health["checked_at"] = datetime.utcnow()
+
+
+def mark_chain_unavailable(error: Exception):
+    if chain_health["available"] is not False:
+        print("BLOCKCHAIN TIDAK TERSEDIA:", str(error))
+
+    chain_health["available"] = False
+    chain_health["error"] = str(error)
+    chain_health["checked_at"] = datetime.utcnow()
+
+
+def chain_available() -> bool:
+    # Status belum diketahui -> tetap dicoba
+    if chain_health["available"] is not False:
+        return True
+
+    # Sudah lama sejak cek terakhir (mis. probe tidak berjalan di CLI)
+    # -> izinkan satu percobaan lagi
+    checked_at = chain_health["checked_at"]
+
+    return (datetime.utcnow() - checked_at).total_seconds() >= RPC_HEALTH_INTERVAL
+
+
+def probe_chain() -> bool:
+    try:
+        mark_chain_available(get_block_number())
+    except Exception as e:
+        mark_chain_unavailable(e)
+
+    return chain_health["available"]
+
+
+def chain_status() -> str:
+    return "online" if chain_available() else "offline"
+
+
+_probe_stop = threading.Event()
+_probe_thread = None
+
+
+def _probe_loop():
+    while not _probe_stop.is_set():
+        probe_chain()
+        _probe_stop.wait(RPC_HEALTH_INTERVAL)
+
+
+def start_health_probe():
+    global _probe_thread
+
+    if _probe_thread and _probe_thread.is_alive():
+        return
+
+    _probe_stop.clear()
+    _probe_thread = threading.Thread(
+        target=_probe_loop,
+        name="chain-health-probe",
+        daemon=True
+    )
+    _probe_thread.start()
+
+
+def stop_health_probe():
+    _probe_stop.set()
+
+    if _probe_thread:
+        _probe_thread.join(timeout=RPC_HEALTH_INTERVAL + 5)
 
-if not w3.is_connected():
-    raise ConnectionError("Gagal terhubung ke RPC Polygon Amoy")
 
 # =============================
-# SMART CONTRACT ABI
+# TRANSACTIONS
 # =============================
-contract_abi = [
-    {
-        "inputs": [{"internalType": "string", "name": "_hash", "type": "string"}],
-        "name": "storeCertificate",
-        "outputs": [],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    },
-    {
-        "inputs": [{"internalType": "string", "name": "_hash", "type": "string"}],
-        "name": "verifyCertificate",
-        "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
-        "stateMutability": "view",
-        "type": "function"
-    }
-]
+def send_certificate_transaction(certificate_hash: str):
+    """
+    Kirim transaksi penyimpanan hash tanpa menunggu mined.
+    Mengembalikan (tx hash hex, nonce). Raise exception jika gagal dikirim.
+    """
+    with _rpc("store"):
+        return get_ledger().store(certificate_hash)
+
+
+def rebroadcast_transaction(certificate_hash: str, nonce: int) -> str:
+    """Kirim ulang transaksi yang macet / di-drop dengan nonce yang sama."""
+    with _rpc("rebroadcast"):
+        return get_ledger().rebroadcast(certificate_hash, nonce)
+
+
+def fill_nonce_gap(nonce: int) -> str:
+    with _rpc("fill_nonce"):
+        return get_ledger().fill_nonce(nonce)
+
+
+def get_transaction_status(tx_hash: str):
+    """
+    None  -> transaksi belum mined
+    True  -> mined dan sukses
+    False -> mined tapi gagal (revert)
+    """
+    with _rpc("receipt"):
+        return get_ledger().receipt(tx_hash)
+
+
+def get_confirmed_nonce():
+    with _rpc("confirmed_nonce"):
+        return get_ledger().confirmed_nonce()
+
 
 # =============================
-# CONTRACT INSTANCE
+# BLOCKS & EVENTS (CHAIN INDEXER)
 # =============================
-contract = w3.eth.contract(
-    address=Web3.to_checksum_address(CONTRACT_ADDRESS),
-    abi=contract_abi
-)
+def get_block_number() -> int:
+    with _rpc("block_number"):
+        return get_ledger().block_number()
+
+
+def get_block_hash(number: int) -> str:
+    with _rpc("block_hash"):
+        return get_ledger().block_hash(number)
+
+
+def get_stored_events(from_block: int, to_block: int) -> list:
+    with _rpc("stored_events"):
+        return get_ledger().stored_events(from_block, to_block)
+
 
 # =============================
-# STORE CERTIFICATE ON BLOCKCHAIN
+# VERIFY CACHE
 # =============================
-def store_certificate_on_chain(certificate_hash: str):
-    try:
-        nonce = w3.eth.get_transaction_count(WALLET_ADDRESS)
+# Anchoring bersifat immutable: hasil True disimpan lama (0 = sampai
+# tergeser LRU), hasil False hanya sebentar karena hash bisa saja baru
+# di-anchor. Error RPC tidak di-cache (hasilnya None, lihat bawah).
+VERIFY_CACHE_SIZE = int(os.getenv("VERIFY_CACHE_SIZE", "100000"))
+VERIFY_CACHE_TTL_TRUE = int(os.getenv("VERIFY_CACHE_TTL_TRUE", "0"))
+VERIFY_CACHE_TTL_FALSE = int(os.getenv("VERIFY_CACHE_TTL_FALSE", "30"))
+
+verify_cache = TTLCache(VERIFY_CACHE_SIZE)
+
+VERIFY_CACHE_REQUESTS.set_function(lambda: {
+    ("hit",): verify_cache.hits,
+    ("miss",): verify_cache.misses
+})
+VERIFY_CACHE_HIT_RATIO.set_function(lambda: verify_cache.stats()["hit_ratio"])
+
 
-        txn = contract.functions.storeCertificate(
-            certificate_hash
-        ).build_transaction({
-            "chainId": 80002,  # Polygon Amoy
-            "gas": 200000,
-            "gasPrice": w3.to_wei("30", "gwei"),
-            "nonce": nonce,
-        })
+def remember_anchored(value: str):
+    """Dipanggil anchor worker saat transaksi terkonfirmasi."""
+    verify_cache.set(value, True, VERIFY_CACHE_TTL_TRUE or None)
 
-        signed_txn = w3.eth.account.sign_transaction(
-            txn,
-            private_key=PRIVATE_KEY
-        )
 
-        tx_hash = w3.eth.send_raw_transaction(
-            signed_txn.raw_transaction
-        )
+def _cache_result(value: str, result: bool):
+    if result:
+        verify_cache.set(value, True, VERIFY_CACHE_TTL_TRUE or None)
+    elif VERIFY_CACHE_TTL_FALSE > 0:
+        # 0 = hasil negatif tidak di-cache (cek ulang setiap request)
+        verify_cache.set(value, False, VERIFY_CACHE_TTL_FALSE)
 
-        tx_hash_hex = w3.to_hex(tx_hash)
 
-        # Tunggu sampai transaksi mined (lebih aman)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+def _cached_results(values: list):
+    """Return (results dari cache, hash yang belum ada di cache)."""
+    results = {}
+    misses = []
 
-        if receipt.status != 1:
-            raise Exception("Transaksi gagal di blockchain")
+    for value in dict.fromkeys(values):
+        found, cached = verify_cache.get(value)
 
-        return tx_hash_hex
+        if found:
+            results[value] = cached
+        else:
+            misses.append(value)
 
+    return results, misses
+
+
+# =============================
+# VERIFY CERTIFICATE ON BLOCKCHAIN
+# =============================
+# Return True / False dari chain (atau cache), None jika chain tidak
+# tersedia -> pemanggil turun ke mode DB-only.
+def verify_certificate_on_chain(certificate_hash: str, use_cache: bool = True):
+    if use_cache:
+        found, cached = verify_cache.get(certificate_hash)
+
+        if found:
+            return cached
+
+    if not chain_available():
+        return None
+
+    try:
+        with _rpc("verify"):
+            result = get_ledger().verify(certificate_hash)
     except Exception as e:
-        print("BLOCKCHAIN STORE ERROR:", str(e))
+        print("BLOCKCHAIN VERIFY ERROR:", str(e))
+        mark_chain_unavailable(e)
         return None
 
+    mark_chain_available()
+    _cache_result(certificate_hash, result)
+
+    return result
+
 
 # =============================
-# VERIFY CERTIFICATE ON BLOCKCHAIN
+# VERIFY (ASYNC)
 # =============================
-def verify_certificate_on_chain(certificate_hash: str):
+async def verify_certificate_on_chain_async(certificate_hash: str, use_cache: bool = True):
+    if use_cache:
+        found, cached = verify_cache.get(certificate_hash)
+
+        if found:
+            return cached
+
+    if not chain_available():
+        return None
+
     try:
-        return contract.functions.verifyCertificate(
-            certificate_hash
-        ).call()
+        with _rpc("verify"):
+            result = await get_ledger().verify_async(certificate_hash)
     except Exception as e:
         print("BLOCKCHAIN VERIFY ERROR:", str(e))
-        return False
\ No newline at end of file
+        mark_chain_unavailable(e)
+        return None
+
+    mark_chain_available()
+    _cache_result(certificate_hash, result)
+
+    return result
+
+
+async def verify_many_on_chain_async(values: list) -> dict:
+    results, misses = _cached_results(values)
+
+    if not misses:
+        return results
+
+    if not chain_available():
+        results.update({value: None for value in misses})
+        return results
+
+    try:
+        with _rpc("verify_many"):
+            responses = await get_ledger().verify_many_async(misses)
+    except Exception as e:
+        print("BLOCKCHAIN BATCH VERIFY ERROR:", str(e))
+        mark_chain_unavailable(e)
+        results.update({value: None for value in misses})
+        return results
+
+    mark_chain_available()
+
+    for value, result in zip(misses, responses):
+        _cache_result(value, result)
+        results[value] = result
+
+    return results
@@ -0,0 +1,308 @@
+import os
+import csv
+import io
+import sys
+import json
+import uuid
+import threading
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from app.database import engine, SessionLocal
+from app.migrations import init_database
+from app.stats import record_issued
+from app.certificate_service import build_certificate_fields, add_certificate_record
+from app.storage import store_certificate_pdf, remove_object
+from app.pdf_cache import render_on_demand
+
+
+# ===============================
+# CONFIGURATION
+# ===============================
+
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", str(os.cpu_count() or 2)))
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "20000"))
+
+# Job yang sudah selesai dihapus dari registry setelah TTL (detik);
+# registry juga dibatasi BULK_MAX_JOBS job selesai terakhir.
+BULK_JOB_TTL = int(os.getenv("BULK_JOB_TTL", "3600"))
+BULK_MAX_JOBS = int(os.getenv("BULK_MAX_JOBS", "100"))
+
+REQUIRED_FIELDS = ("name", "nim", "program_studi", "institusi")
+
+
+# ===============================
+# PARSE INPUT
+# ===============================
+
+def parse_rows(content, filename: str = "") -> list:
+    """
+    Baca CSV (header: name,nim,program_studi,institusi) atau JSONL
+    (satu objek per baris). Return list of (row_number, dict).
+    Raise ValueError jika file tidak bisa dibaca.
+    """
+    if isinstance(content, bytes):
+        try:
+            content = content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise ValueError("File harus ber-encoding UTF-8")
+
+    if filename.lower().endswith((".jsonl", ".ndjson")):
+        rows = []
+
+        for number, line in enumerate(content.splitlines(), start=1):
+            if line.strip():
+                try:
+                    rows.append((number, json.loads(line)))
+                except ValueError:
+                    rows.append((number, None))
+
+        return rows
+
+    reader = csv.DictReader(io.StringIO(content))
+
+    try:
+        # Baris 1 adalah header
+        return [(number, row) for number, row in enumerate(reader, start=2)]
+    except csv.Error as e:
+        raise ValueError(f"CSV tidak valid: {e}")
+
+
+def validate_row(row) -> str:
+    if not isinstance(row, dict):
+        return "Format baris tidak valid"
+
+    missing = [f for f in REQUIRED_FIELDS if not str(row.get(f) or "").strip()]
+
+    if missing:
+        return "Kolom kosong: " + ", ".join(missing)
+
+    return ""
+
+
+# ===============================
+# JOB REGISTRY
+# ===============================
+
+class BulkJob:
+
+    def __init__(self, total: int):
+        self.job_id = str(uuid.uuid4())
+        self.total = total
+        self.to_render = 0
+        self.rendered = 0
+        self.issued = 0
+        self.status = "PENDING"  # PENDING / RUNNING / DONE / FAILED
+        self.errors = []
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "total": self.total,
+            "to_render": self.to_render,
+            "rendered": self.rendered,
+            "issued": self.issued,
+            "errors": self.errors,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _prune_jobs():
+    """Buang job selesai yang lewat BULK_JOB_TTL atau melebihi BULK_MAX_JOBS."""
+    now = datetime.utcnow()
+
+    with _jobs_lock:
+        finished = sorted(
+            (job for job in jobs.values() if job.finished_at),
+            key=lambda job: job.finished_at
+        )
+        excess = len(finished) - BULK_MAX_JOBS
+
+        for index, job in enumerate(finished):
+            if index < excess or (now - job.finished_at).total_seconds() > BULK_JOB_TTL:
+                del jobs[job.job_id]
+
+
+def get_job(job_id: str):
+    _prune_jobs()
+    return jobs.get(job_id)
+
+
+# ===============================
+# RUN
+# ===============================
+
+def run_bulk_issuance(rows: list, job: BulkJob = None, progress=None) -> BulkJob:
+    """
+    1. Validasi baris
+    2. Render PDF paralel di process pool
+    3. Insert semua Certificate + antrian anchoring dalam SATU transaksi
+
+    Exception apa pun menandai job FAILED (job tidak pernah tertinggal
+    RUNNING).
+    """
+    job = job or BulkJob(total=len(rows))
+    job.status = "RUNNING"
+
+    try:
+        _issue(rows, job, progress)
+    except Exception as e:
+        print("BULK ISSUANCE ERROR:", str(e))
+        job.errors.append({"row": None, "error": f"Bulk issuance gagal: {e}"})
+        job.status = "FAILED"
+    finally:
+        job.errors.sort(key=lambda e: e["row"] or 0)
+        job.finished_at = datetime.utcnow()
+
+    return job
+
+
+def _issue(rows: list, job: BulkJob, progress=None):
+    pending = []
+
+    for number, row in rows:
+        error = validate_row(row)
+
+        if error:
+            job.errors.append({"row": number, "error": error})
+            continue
+
+        fields = build_certificate_fields(
+            *(str(row[f]).strip() for f in REQUIRED_FIELDS)
+        )
+        pending.append((number, fields))
+
+    rendered = []
+
+    if render_on_demand():
+        # PDF dirender saat diunduh, cukup simpan datanya
+        rendered = [fields for _, fields in pending]
+
+    elif pending:
+        job.to_render = len(pending)
+
+        # spawn: aman dipanggil dari thread web server
+        context = multiprocessing.get_context("spawn")
+
+        with ProcessPoolExecutor(max_workers=BULK_WORKERS, mp_context=context) as pool:
+            futures = {
+                pool.submit(store_certificate_pdf, fields): (number, fields)
+                for number, fields in pending
+            }
+
+            for future in as_completed(futures):
+                number, fields = futures[future]
+
+                try:
+                    fields["pdf_sha256"] = future.result()
+                    rendered.append(fields)
+                except Exception as e:
+                    job.errors.append({"row": number, "error": f"Render gagal: {e}"})
+
+                job.rendered += 1
+
+                if progress:
+                    progress(job)
+
+    db = SessionLocal()
+
+    try:
+        for fields in rendered:
+            add_certificate_record(db, fields)
+
+        groups = Counter((f["institusi"], f["program_studi"]) for f in rendered)
+
+        for (institusi, program_studi), count in groups.items():
+            record_issued(db, institusi, program_studi, count)
+
+        db.commit()
+        job.issued = len(rendered)
+        job.status = "DONE"
+
+    except Exception as e:
+        db.rollback()
+        print("BULK ISSUANCE ERROR:", str(e))
+
+        for fields in rendered:
+            remove_object(fields.get("pdf_sha256"))
+
+        job.errors.append({"row": None, "error": f"Gagal menyimpan ke database: {e}"})
+        job.status = "FAILED"
+
+    finally:
+        db.close()
+
+
+def start_bulk_job(rows: list) -> BulkJob:
+    """Jalankan bulk issuance di thread background (dipakai endpoint)."""
+    _prune_jobs()
+
+    job = BulkJob(total=len(rows))
+
+    with _jobs_lock:
+        jobs[job.job_id] = job
+
+    threading.Thread(
+        target=run_bulk_issuance,
+        args=(rows, job),
+        name=f"bulk-{job.job_id[:8]}",
+        daemon=True
+    ).start()
+
+    return job
+
+
+# ===============================
+# CLI
+# ===============================
+# python -m app.bulk_issuance cohort.csv
+# python -m app.bulk_issuance cohort.jsonl
+
+def _print_progress(job: BulkJob):
+    if job.rendered % 100 == 0 or job.rendered == job.to_render:
+        print(f"Render {job.rendered}/{job.to_render}")
+
+
+def main(argv: list):
+    if len(argv) != 2:
+        print("Usage: python -m app.bulk_issuance <file.csv|file.jsonl>")
+        return 1
+
+    path = argv[1]
+
+    try:
+        with open(path, "rb") as f:
+            rows = parse_rows(f.read(), path)
+    except ValueError as e:
+        print(str(e))
+        return 1
+
+    if len(rows) > BULK_MAX_ROWS:
+        print(f"Maksimal {BULK_MAX_ROWS} baris per file")
+        return 1
+
+    # Skema sama dengan startup app (database baru / lama)
+    init_database(engine)
+
+    job = run_bulk_issuance(rows, progress=_print_progress)
+
+    for error in job.errors:
+        print(f"Baris {error['row']}: {error['error']}")
+
+    print(f"Status: {job.status} - {job.issued}/{job.total} sertifikat diterbitkan")
+
+    return 0 if job.status == "DONE" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
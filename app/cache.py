@@ -0,0 +1,75 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+# ==========================================================
+# TTL + LRU CACHE
+# ==========================================================
+
+class TTLCache:
+    """
+    Cache in-process dengan ukuran terbatas (LRU eviction) dan
+    TTL per entry. ttl=None berarti entry tidak pernah kedaluwarsa
+    (hanya keluar karena LRU); ttl <= 0 berarti tidak disimpan.
+    Thread-safe.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (found, value)."""
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is not None:
+                value, expires_at = entry
+
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+
+                del self._data[key]
+
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, ttl=None):
+        if ttl is not None and ttl <= 0:
+            self.delete(key)
+            return
+
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0
+            }
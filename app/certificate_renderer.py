@@ -0,0 +1,259 @@
+import io
+import os
+import copy
+import json
+import hashlib
+import threading
+
+import qrcode
+from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfdoc
+from reportlab.lib import colors
+from reportlab.lib.boxstuff import aspectRatioFix
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+
+from app.metrics import RENDER_DURATION
+
+
+# ===============================
+# PATH CONFIGURATION
+# ===============================
+# Modul ini sengaja hanya bergantung pada qrcode & reportlab (dan
+# app.metrics yang hanya stdlib) agar
+# bisa dijalankan di process pool (bulk issuance) tanpa ikut memuat
+# koneksi database / blockchain.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+
+CERT_DIR = os.path.join(PROJECT_ROOT, "certificates")
+
+CERTIFICATE_TEMPLATE = os.getenv(
+    "CERTIFICATE_TEMPLATE",
+    os.path.join(PROJECT_ROOT, "certificate_templates", "default.json")
+)
+
+if not os.path.exists(CERT_DIR):
+    os.makedirs(CERT_DIR)
+
+
+def _project_path(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+def _mtime(path: str):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+# ===============================
+# TEMPLATE
+# ===============================
+# Layout statis (border, logo, judul, label, garis tanda tangan)
+# dibaca dari file JSON dan disiapkan SEKALI per proses. Bagian
+# termahal adalah logo: reportlab mendekode dan mengompres ulang PNG
+# di setiap dokumen, jadi image XObject logo dibuat sekali lalu hanya
+# didaftarkan ke tiap PDF. Per sertifikat hanya field variabel + QR
+# yang digambar.
+
+STATIC_FORM = "certificate_static"
+
+
+class CertificateTemplate:
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, "rb") as f:
+            raw = f.read()
+
+        self.layout = json.loads(raw)
+        digest = hashlib.sha256(raw)
+
+        self.page_size = tuple(self.layout.get("page_size", A4))
+
+        logo = self.layout.get("logo")
+        self.logo_path = _project_path(logo["path"]) if logo else None
+        self.logo = None
+
+        if self.logo_path and os.path.exists(self.logo_path):
+            with open(self.logo_path, "rb") as f:
+                logo_bytes = f.read()
+
+            digest.update(logo_bytes)
+            self.logo = pdfdoc.PDFImageXObject(
+                "certificate_logo", ImageReader(io.BytesIO(logo_bytes)), mask="auto"
+            )
+        elif self.logo_path:
+            print("LOGO TIDAK DITEMUKAN:", self.logo_path)
+
+        # Berubah jika layout / logo berubah (dipakai key cache PDF)
+        self.fingerprint = digest.hexdigest()
+
+        self.mtimes = self._current_mtimes()
+
+    def _current_mtimes(self):
+        return (_mtime(self.path), _mtime(self.logo_path) if self.logo_path else None)
+
+    def is_stale(self) -> bool:
+        return self._current_mtimes() != self.mtimes
+
+    # -------------------------------
+    # STATIC LAYER
+    # -------------------------------
+
+    def draw_static(self, c):
+        """Definisikan layer statis sebagai form XObject lalu tempel ke halaman."""
+        c.beginForm(STATIC_FORM)
+
+        border = self.layout.get("border")
+
+        if border:
+            c.setStrokeColor(getattr(colors, border.get("color", "black")))
+            c.setLineWidth(border.get("line_width", 1))
+            c.rect(*border["rect"])
+
+        if self.logo:
+            _draw_image_xobject(c, self.logo, *self.layout["logo"]["rect"])
+
+        for item in self.layout.get("static", []):
+            _draw_text(c, item, item["text"])
+
+        for line in self.layout.get("lines", []):
+            c.line(*line)
+
+        c.endForm()
+        c.doForm(STATIC_FORM)
+
+    # -------------------------------
+    # VARIABLE FIELDS
+    # -------------------------------
+
+    def draw_fields(self, c, fields: dict, qr_image):
+        for item in self.layout.get("fields", []):
+            text = item["text"].format(**fields)
+
+            if item.get("upper"):
+                text = text.upper()
+
+            _draw_text(c, item, text)
+
+        qr = self.layout.get("qr")
+
+        if qr:
+            c.drawImage(qr_image, *qr["rect"])
+
+
+def _draw_text(c, item: dict, text: str):
+    c.setFont(item["font"], item["size"])
+
+    if item.get("align") == "center":
+        c.drawCentredString(item["x"], item["y"], text)
+    elif item.get("align") == "right":
+        c.drawRightString(item["x"], item["y"], text)
+    else:
+        c.drawString(item["x"], item["y"], text)
+
+
+def _draw_image_xobject(c, image, x, y, width, height):
+    """
+    Setara canvas.drawImage(..., preserveAspectRatio=True) tetapi
+    memakai PDFImageXObject yang sudah dikompres. Objek disalin per
+    dokumen karena reportlab menulis referensi smask ke objeknya.
+    """
+    doc = c._doc
+    reg_name = doc.getXObjectName(image.name)
+
+    if doc.idToObject.get(reg_name) is None:
+        obj = copy.copy(image)
+        smask = getattr(image, "_smask", None)
+
+        if smask is not None:
+            del obj._smask
+            obj.smask = doc.Reference(
+                copy.copy(smask), doc.getXObjectName(smask.name)
+            )
+
+        doc.Reference(obj, reg_name)
+        doc.addForm(image.name, obj)
+
+    x, y, width, height, _ = aspectRatioFix(
+        True, "c", x, y, width, height, image.width, image.height
+    )
+
+    c.saveState()
+    c.translate(x, y)
+    c.scale(width, height)
+    c._code.append(f"/{reg_name} Do")
+    c.restoreState()
+
+    c._formsinuse.append(image.name)
+
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def get_template() -> CertificateTemplate:
+    """Template aktif; dimuat ulang otomatis jika file template / logo berubah."""
+    global _template
+
+    with _template_lock:
+        if _template is None or _template.is_stale():
+            _template = CertificateTemplate(CERTIFICATE_TEMPLATE)
+            print("TEMPLATE SERTIFIKAT DIMUAT:", CERTIFICATE_TEMPLATE)
+
+        return _template
+
+
+# ===============================
+# RENDER PDF
+# ===============================
+
+def render_certificate_bytes(fields: dict) -> bytes:
+    """
+    Render PDF sertifikat sepenuhnya di memori (QR + PDF tanpa file
+    sementara). Return isi PDF.
+
+    fields: certificate_id, certificate_hash, name, nim,
+            program_studi, institusi, issue_date, qr_data (opsional,
+            isi QR; default certificate_hash)
+    """
+    # ===============================
+    # GENERATE QR
+    # ===============================
+    with RENDER_DURATION.time(stage="qr"):
+        qr = qrcode.make(fields.get("qr_data") or fields["certificate_hash"])
+        qr_image = ImageReader(qr.get_image())
+
+    # ===============================
+    # GENERATE PDF
+    # ===============================
+    template = get_template()
+
+    buffer = io.BytesIO()
+
+    with RENDER_DURATION.time(stage="pdf"):
+        # invariant: tanggal & ID dokumen tetap -> bytes identik setiap render
+        c = canvas.Canvas(buffer, pagesize=template.page_size, invariant=1)
+
+        template.draw_static(c)
+        template.draw_fields(c, fields, qr_image)
+
+        c.save()
+
+    return buffer.getvalue()
+
+
+def remove_certificate_files(certificate_id: str):
+    # File datar CERT_DIR/{id}.pdf & *_qr.png hanya ada pada sertifikat
+    # lama (sebelum object store, lihat app/storage.py)
+    for path in (
+        os.path.join(CERT_DIR, f"{certificate_id}.pdf"),
+        os.path.join(CERT_DIR, f"{certificate_id}_qr.png")
+    ):
+        if os.path.exists(path):
+            os.remove(path)
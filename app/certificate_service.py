@@ -1,149 +1,120 @@
-import os
 import uuid
 import hashlib
 from datetime import datetime
 
-import qrcode
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
+from sqlalchemy.orm import Session
 
 from app.database import SessionLocal
 from app.models import Certificate
-from app.blockchain import store_certificate_on_chain
+from app.anchoring import enqueue_anchor
+from app.stats import record_issued
+from app.storage import store_certificate_pdf
+from app.pdf_cache import render_on_demand
+from app.qr_payload import qr_content
 
 
 # ===============================
-# PATH CONFIGURATION
+# CERTIFICATE FIELDS
 # ===============================
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-PROJECT_ROOT = os.path.dirname(BASE_DIR)
-
-CERT_DIR = os.path.join(PROJECT_ROOT, "certificates")
-STATIC_DIR = os.path.join(PROJECT_ROOT, "static")
-LOGO_PATH = os.path.join(STATIC_DIR, "UCA.png")
-
-if not os.path.exists(CERT_DIR):
-    os.makedirs(CERT_DIR)
-
-
-# ===============================
-# MAIN FUNCTION
-# ===============================
-
-def generate_certificate(name, nim, program_studi, institusi):
+def compute_certificate_hash(name, nim, program_studi, institusi, certificate_id) -> str:
+    raw_data = f"{name}{nim}{program_studi}{institusi}{certificate_id}"
+    return hashlib.sha256(raw_data.encode()).hexdigest()
 
-    db = SessionLocal()
 
+def build_certificate_fields(name, nim, program_studi, institusi) -> dict:
     certificate_id = str(uuid.uuid4())
     issue_date = datetime.now().strftime("%d %B %Y")
 
-    raw_data = f"{name}{nim}{program_studi}{institusi}{certificate_id}"
-    certificate_hash = hashlib.sha256(raw_data.encode()).hexdigest()
-
-    print("HASH YANG DIGENERATE:", certificate_hash)
-
-    # 🔗 Store ke Blockchain
-    try:
-        tx_hash = store_certificate_on_chain(certificate_hash)
-        print("BLOCKCHAIN TX HASH:", tx_hash)
-    except Exception as e:
-        tx_hash = None
-        print("ERROR BLOCKCHAIN:", e)
-
-    pdf_path = os.path.join(CERT_DIR, f"{certificate_id}.pdf")
-    qr_path = os.path.join(CERT_DIR, f"{certificate_id}_qr.png")
-
-    # ===============================
-    # GENERATE QR
-    # ===============================
-    qr = qrcode.make(certificate_hash)
-    qr.save(qr_path)
-
-    # ===============================
-    # GENERATE PDF
-    # ===============================
-    c = canvas.Canvas(pdf_path, pagesize=A4)
-    width, height = A4
-
-    # Border
-    c.setStrokeColor(colors.darkblue)
-    c.setLineWidth(4)
-    c.rect(30, 30, width - 60, height - 60)
+    fields = {
+        "certificate_id": certificate_id,
+        "certificate_hash": compute_certificate_hash(
+            name, nim, program_studi, institusi, certificate_id
+        ),
+        "name": name,
+        "nim": nim,
+        "program_studi": program_studi,
+        "institusi": institusi,
+        "issue_date": issue_date
+    }
+
+    # Dihitung di sini (bukan di renderer) agar process pool bulk
+    # issuance tidak perlu kunci penerbit
+    fields["qr_data"] = qr_content(fields)
+
+    return fields
+
+
+def fields_from_certificate(cert: Certificate) -> dict:
+    """Field render dari baris Certificate (untuk render on-demand)."""
+    fields = {
+        "certificate_id": cert.certificate_id,
+        "certificate_hash": cert.certificate_hash,
+        "name": cert.name,
+        "nim": cert.nim,
+        "program_studi": cert.program_studi,
+        "institusi": cert.institusi,
+        "issue_date": cert.issue_date
+    }
+    fields["qr_data"] = qr_content(fields)
+
+    return fields
+
+
+def add_certificate_record(db: Session, fields: dict) -> Certificate:
+    """
+    Tambah baris Certificate + antrian anchoring.
+    Tidak melakukan commit (dan tidak mengubah counter dashboard).
+    """
+    new_certificate = Certificate(
+        certificate_id=fields["certificate_id"],
+        name=fields["name"],
+        nim=fields["nim"],
+        program_studi=fields["program_studi"],
+        institusi=fields["institusi"],
+        issue_date=fields["issue_date"],
+        certificate_hash=fields["certificate_hash"],
+        pdf_sha256=fields.get("pdf_sha256"),
+        blockchain_tx=None,
+        anchor_status="PENDING"
+    )
 
-    # ===============================
-    # LOGO
-    # ===============================
-    if os.path.exists(LOGO_PATH):
-        c.drawImage(
-            LOGO_PATH,
-            width/2 - 50,
-            height - 150,
-            width=100,
-            height=100,
-            preserveAspectRatio=True,
-            mask='auto'
-        )
-    else:
-        print("LOGO TIDAK DITEMUKAN:", LOGO_PATH)
+    db.add(new_certificate)
 
-    # ===============================
-    # TITLE
-    # ===============================
-    c.setFont("Helvetica-Bold", 24)
-    c.drawCentredString(width/2, height - 180, "SERTIFIKAT AKADEMIK")
+    # 🔗 Antrikan ke Blockchain (diproses oleh anchor worker)
+    enqueue_anchor(db, fields["certificate_hash"])
 
-    c.setFont("Helvetica", 14)
-    c.drawCentredString(width/2, height - 210, "Diberikan kepada:")
+    return new_certificate
 
-    # Name
-    c.setFont("Helvetica-Bold", 20)
-    c.drawCentredString(width/2, height - 250, name.upper())
 
-    # Details
-    c.setFont("Helvetica", 14)
-    c.drawCentredString(width/2, height - 280, f"NIM: {nim}")
-    c.drawCentredString(width/2, height - 300, f"Program Studi: {program_studi}")
-    c.drawCentredString(width/2, height - 320, f"Institusi: {institusi}")
+# ===============================
+# MAIN FUNCTION
+# ===============================
 
-    # Certificate ID
-    c.setFont("Helvetica-Oblique", 10)
-    c.drawCentredString(width/2, height - 350, f"Nomor Sertifikat: {certificate_id}")
+def generate_certificate(name, nim, program_studi, institusi):
 
-    # Issue Date
-    c.drawString(60, 100, f"Tanggal Terbit: {issue_date}")
+    db = SessionLocal()
 
-    # Signature Line
-    c.line(width - 200, 120, width - 60, 120)
-    c.drawString(width - 190, 100, "Kepala Program Studi")
+    fields = build_certificate_fields(name, nim, program_studi, institusi)
 
-    # QR Code
-    c.drawImage(qr_path, width - 150, 200, width=100, height=100)
+    print("HASH YANG DIGENERATE:", fields["certificate_hash"])
 
-    c.save()
+    # Mode on_demand: PDF dirender saat diunduh
+    if not render_on_demand():
+        fields["pdf_sha256"] = store_certificate_pdf(fields)
 
     # ===============================
     # SAVE TO DATABASE
     # ===============================
-    new_certificate = Certificate(
-        certificate_id=certificate_id,
-        name=name,
-        nim=nim,
-        program_studi=program_studi,
-        institusi=institusi,
-        issue_date=issue_date,
-        certificate_hash=certificate_hash,
-        blockchain_tx=tx_hash
-    )
+    add_certificate_record(db, fields)
+    record_issued(db, institusi, program_studi)
 
-    db.add(new_certificate)
     db.commit()
-    db.refresh(new_certificate)
     db.close()
 
     return {
-        "certificate_id": certificate_id,
-        "certificate_hash": certificate_hash,
-        "blockchain_tx": tx_hash
-    }
\ No newline at end of file
+        "certificate_id": fields["certificate_id"],
+        "certificate_hash": fields["certificate_hash"],
+        "blockchain_tx": None,
+        "anchor_status": "PENDING"
+    }
@@ -0,0 +1,225 @@
+import os
+import sys
+import threading
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.database import SessionLocal
+from app.models import ChainAnchor, IndexerCursor
+from app.blockchain import (
+    get_block_number,
+    get_block_hash,
+    get_stored_events,
+    chain_available
+)
+
+
+# ===============================
+# CONFIGURATION
+# ===============================
+# Indexer mengikuti event CertificateStored dari kontrak dan menyimpan
+# hash yang sudah tercatat on-chain ke tabel chain_anchors, sehingga
+# /verify cukup lookup lokal; RPC hanya untuk hash yang belum ter-index.
+
+CHAIN_INDEXER_ENABLED = os.getenv("CHAIN_INDEXER_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Blok deploy kontrak. Kosong = mulai dari blok terbaru saat cursor
+# pertama kali dibuat (tidak memindai dari genesis); hash yang di-anchor
+# sebelumnya tetap diverifikasi lewat RPC.
+_START_BLOCK_ENV = os.getenv("CHAIN_INDEXER_START_BLOCK", "").strip()
+CHAIN_INDEXER_START_BLOCK = int(_START_BLOCK_ENV) if _START_BLOCK_ENV else None
+
+# Jumlah blok per panggilan eth_getLogs
+CHAIN_INDEXER_RANGE = int(os.getenv("CHAIN_INDEXER_RANGE", "2000"))
+
+# Jumlah blok yang di-index ulang saat reorg terdeteksi
+CHAIN_INDEXER_REORG_DEPTH = int(os.getenv("CHAIN_INDEXER_REORG_DEPTH", "12"))
+
+CHAIN_INDEXER_POLL_INTERVAL = float(os.getenv("CHAIN_INDEXER_POLL_INTERVAL", "5"))
+
+CURSOR_NAME = "CertificateStored"
+
+
+# ===============================
+# CURSOR
+# ===============================
+
+def _start_block(latest: int) -> int:
+    if CHAIN_INDEXER_START_BLOCK is None:
+        return latest + 1
+
+    return CHAIN_INDEXER_START_BLOCK
+
+
+def _load_cursor(db: Session, latest: int) -> IndexerCursor:
+    # Insert-or-ignore: beberapa worker bisa start bersamaan
+    db.execute(
+        sqlite_insert(IndexerCursor)
+        .values(name=CURSOR_NAME, block_number=_start_block(latest) - 1)
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    db.commit()
+
+    return db.get(IndexerCursor, CURSOR_NAME)
+
+
+def _rollback(db: Session, cursor: IndexerCursor, block_number: int):
+    """Buang hasil index setelah block_number lalu mundurkan cursor."""
+    block_number = max(block_number, (CHAIN_INDEXER_START_BLOCK or 0) - 1)
+
+    print(f"CHAIN INDEXER REORG: mundur dari blok {cursor.block_number} ke {block_number}")
+
+    db.query(ChainAnchor).filter(
+        ChainAnchor.block_number > block_number
+    ).delete(synchronize_session=False)
+
+    cursor.block_number = block_number
+    cursor.block_hash = None
+    db.commit()
+
+
+def _store_events(db: Session, events: list, chunk_size: int = 500):
+    for start in range(0, len(events), chunk_size):
+        stmt = sqlite_insert(ChainAnchor).values([
+            {
+                "value": event["value"],
+                "block_number": event["block_number"],
+                "tx_hash": event["tx_hash"],
+                "log_index": event["log_index"]
+            }
+            for event in events[start:start + chunk_size]
+        ])
+
+        # Idempotent: range yang di-index ulang (reorg / worker lain)
+        # hanya memperbarui posisi bloknya
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["value"],
+            set_={
+                "block_number": stmt.excluded.block_number,
+                "tx_hash": stmt.excluded.tx_hash,
+                "log_index": stmt.excluded.log_index
+            }
+        ))
+
+
+# ===============================
+# SYNC
+# ===============================
+
+def sync_once() -> int:
+    """
+    Index event sampai blok terbaru. Return jumlah event yang diproses.
+
+    Reorg dideteksi dari hash blok cursor: jika berbeda dengan hash di
+    chain (atau chain lebih pendek dari cursor), CHAIN_INDEXER_REORG_DEPTH
+    blok terakhir dibuang lalu di-index ulang.
+    """
+    db = SessionLocal()
+    processed = 0
+
+    try:
+        latest = get_block_number()
+        cursor = _load_cursor(db, latest)
+
+        if cursor.block_number > latest:
+            _rollback(db, cursor, latest - CHAIN_INDEXER_REORG_DEPTH)
+
+        elif cursor.block_hash and get_block_hash(cursor.block_number) != cursor.block_hash:
+            _rollback(db, cursor, cursor.block_number - CHAIN_INDEXER_REORG_DEPTH)
+
+        while cursor.block_number < latest:
+            start = cursor.block_number + 1
+            end = min(start + CHAIN_INDEXER_RANGE - 1, latest)
+
+            # Hash diambil sebelum log: reorg di antaranya terdeteksi
+            # pada putaran berikutnya
+            end_hash = get_block_hash(end)
+            events = get_stored_events(start, end)
+
+            _store_events(db, events)
+
+            cursor.block_number = end
+            cursor.block_hash = end_hash
+            db.commit()
+
+            processed += len(events)
+
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return processed
+
+
+# ===============================
+# LOOKUP
+# ===============================
+
+def _indexed_query(values: list):
+    return select(ChainAnchor.value).where(ChainAnchor.value.in_(values))
+
+
+async def indexed_values_async(db, values: list) -> set:
+    """Subset values yang sudah tercatat on-chain menurut index lokal."""
+    if not values:
+        return set()
+
+    result = await db.execute(_indexed_query(list(set(values))))
+    return set(result.scalars())
+
+
+# ===============================
+# BACKGROUND WORKER
+# ===============================
+
+_stop_event = threading.Event()
+_worker_thread = None
+
+
+def _worker_loop():
+    while not _stop_event.is_set():
+        if chain_available():
+            try:
+                sync_once()
+            except Exception as e:
+                print("CHAIN INDEXER ERROR:", str(e))
+
+        _stop_event.wait(CHAIN_INDEXER_POLL_INTERVAL)
+
+
+def start_chain_indexer():
+    global _worker_thread
+
+    if not CHAIN_INDEXER_ENABLED:
+        return
+
+    if _worker_thread and _worker_thread.is_alive():
+        return
+
+    _stop_event.clear()
+    _worker_thread = threading.Thread(
+        target=_worker_loop,
+        name="chain-indexer",
+        daemon=True
+    )
+    _worker_thread.start()
+
+
+def stop_chain_indexer():
+    _stop_event.set()
+
+    if _worker_thread:
+        _worker_thread.join(timeout=CHAIN_INDEXER_POLL_INTERVAL + 30)
+
+
+# python -m app.chain_indexer sync
+if __name__ == "__main__":
+    if sys.argv[1:] != ["sync"]:
+        print("Usage: python -m app.chain_indexer sync")
+        sys.exit(1)
+
+    print(f"{sync_once()} event di-index")
@@ -1,18 +1,168 @@
-from sqlalchemy import create_engine
+import os
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-DATABASE_URL = "sqlite:///./sertisah.db"
+from app.metrics import DB_QUERY_DURATION
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sertisah.db")
+ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+
+# ==========================================================
+# SQLITE ENGINE PROFILE
+# ==========================================================
+# WAL: pembaca tidak menunggu penulis (dan sebaliknya), termasuk
+# antar proses uvicorn. synchronous=NORMAL aman untuk WAL dan jauh
+# lebih murah daripada FULL.
+
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))      # ms
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-64000"))       # negatif = KiB
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", "268435456"))      # bytes
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False):
+    cursor = dbapi_connection.cursor()
+
+    if not read_only:
+        # journal_mode tersimpan di file database, cukup di-set penulis
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}")
+    cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
+
+    cursor.close()
+
+
+def instrument_engine(sync_engine, name: str):
+    """Catat durasi setiap statement ke sertisah_db_query_duration_seconds."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_started", None)
+
+        if started is None:
+            return
+
+        words = statement.split(None, 1)
+
+        DB_QUERY_DURATION.observe(
+            time.perf_counter() - started,
+            engine=name,
+            operation=words[0].upper() if words else ""
+        )
+
+
+def _connect_args():
+    return {
+        "check_same_thread": False,
+        "timeout": SQLITE_BUSY_TIMEOUT / 1000
+    }
+
+
+# ==========================================================
+# WRITE ENGINE
+# ==========================================================
 
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False}
+    connect_args=_connect_args(),
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT
 )
 
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    apply_sqlite_pragmas(dbapi_connection)
+
+
+instrument_engine(engine, "write")
+
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine
 )
 
-Base = declarative_base()
\ No newline at end of file
+
+# ==========================================================
+# READ-ONLY ENGINE
+# ==========================================================
+# Untuk list / dashboard admin. query_only mencegah penulisan tidak
+# sengaja; dengan WAL pembacaan tidak terblokir transaksi tulis.
+
+read_engine = create_engine(
+    DATABASE_URL,
+    connect_args=_connect_args(),
+    pool_size=DB_READ_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT
+)
+
+
+@event.listens_for(read_engine, "connect")
+def _on_read_connect(dbapi_connection, connection_record):
+    apply_sqlite_pragmas(dbapi_connection, read_only=True)
+
+
+instrument_engine(read_engine, "read")
+
+ReadSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=read_engine
+)
+
+
+# ==========================================================
+# ASYNC READ-ONLY ENGINE
+# ==========================================================
+# Engine async (aiosqlite) untuk endpoint publik /verify. Hanya
+# membaca: audit log ditulis lewat audit_sink.
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    connect_args={"timeout": SQLITE_BUSY_TIMEOUT / 1000},
+    pool_size=DB_READ_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT
+)
+
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def _on_async_connect(dbapi_connection, connection_record):
+    apply_sqlite_pragmas(dbapi_connection, read_only=True)
+
+
+instrument_engine(async_engine.sync_engine, "async_read")
+
+AsyncReadSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+Base = declarative_base()
@@ -0,0 +1,170 @@
+import os
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+
+# ==========================================================
+# CACHE HEADERS
+# ==========================================================
+
+# Object content-addressed tidak pernah berubah
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# PDF render on-demand bisa berubah jika template diganti: revalidasi via ETag
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+
+    tags = [t.strip() for t in if_none_match.split(",")]
+
+    # Perbandingan weak (RFC 9110): abaikan prefix W/
+    return etag in [t[2:] if t.startswith("W/") else t for t in tags]
+
+
+def is_not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    """If-None-Match didahulukan; If-Modified-Since hanya jika tidak ada."""
+    if_none_match = request.headers.get("if-none-match")
+
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+        return int(last_modified) <= int(since)
+
+    return False
+
+
+def _not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": cache_control}
+    )
+
+
+def _disposition(filename: str) -> str:
+    return f'attachment; filename="{filename}"'
+
+
+# ==========================================================
+# FILE DOWNLOAD
+# ==========================================================
+# FileResponse sudah menangani Range / If-Range; di sini ditambah
+# ETag (sha256 isi), Cache-Control dan 304.
+
+def file_download(
+    request: Request,
+    path: str,
+    etag: str,
+    filename: str,
+    cache_control: str = IMMUTABLE_CACHE_CONTROL
+):
+    last_modified = os.path.getmtime(path)
+
+    if is_not_modified(request, etag, last_modified):
+        return _not_modified(etag, cache_control)
+
+    return FileResponse(
+        path=path,
+        media_type="application/pdf",
+        filename=filename,
+        headers={"ETag": etag, "Cache-Control": cache_control}
+    )
+
+
+# ==========================================================
+# BYTES DOWNLOAD (render on-demand)
+# ==========================================================
+
+def _parse_range(header: str, size: int):
+    """
+    Return (start, end) inklusif untuk satu range "bytes=a-b",
+    None jika header diabaikan (multi-range / format lain), atau
+    False jika range tidak bisa dipenuhi (416).
+    """
+    unit, _, spec = header.partition("=")
+
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+
+    start, _, end = spec.strip().partition("-")
+
+    try:
+        if start:
+            start = int(start)
+            end = int(end) if end else size - 1
+        else:
+            # bytes=-N -> N byte terakhir
+            suffix = int(end)
+
+            if suffix == 0:
+                return False
+
+            start = max(size - suffix, 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        return False
+
+    return start, min(end, size - 1)
+
+
+def bytes_download(
+    request: Request,
+    data: bytes,
+    etag: str,
+    filename: str,
+    last_modified: float = None,
+    cache_control: str = REVALIDATE_CACHE_CONTROL,
+    media_type: str = "application/pdf"
+):
+    if is_not_modified(request, etag, last_modified):
+        return _not_modified(etag, cache_control)
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": _disposition(filename)
+    }
+
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+
+    if range_header and (if_range is None or if_range == etag):
+        byte_range = _parse_range(range_header, len(data))
+
+        if byte_range is False:
+            return Response(
+                status_code=416,
+                headers={"Content-Range": f"bytes */{len(data)}"}
+            )
+
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+
+            return Response(
+                content=data[start:end + 1],
+                status_code=206,
+                media_type=media_type,
+                headers=headers
+            )
+
+    return Response(content=data, media_type=media_type, headers=headers)
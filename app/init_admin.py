@@ -1,9 +1,10 @@
 from app.database import engine, SessionLocal
-from app.models import AdminUser, Base
+from app.models import AdminUser
+from app.migrations import init_database
 from app.auth import hash_password
 
 def init():
-    Base.metadata.create_all(bind=engine)
+    init_database(engine)
 
     db = SessionLocal()
     admin = db.query(AdminUser).filter_by(username="admin").first()
@@ -0,0 +1,122 @@
+import os
+import asyncio
+import threading
+
+
+# ==========================================================
+# LEDGER BACKEND
+# ==========================================================
+# LEDGER_BACKEND:
+#   web3      -> smart contract via RPC (default, app/ledger_web3.py)
+#   simulated -> ledger lokal in-process / SQLite dengan latency
+#                yang bisa diatur (app/ledger_simulated.py), untuk
+#                load test, benchmark dan CI tanpa RPC / gas
+
+LEDGER_BACKEND = os.getenv("LEDGER_BACKEND", "web3").lower()
+
+
+class ChainUnavailable(Exception):
+    pass
+
+
+class Ledger:
+    """
+    Antarmuka ledger. Semua method boleh raise exception jika ledger
+    tidak bisa dihubungi; cache dan mode DB-only diatur di
+    app/blockchain.py, bukan di sini.
+    """
+
+    name = "base"
+
+    # -------------------------------
+    # WRITE
+    # -------------------------------
+
+    def store(self, value: str):
+        """Kirim transaksi penyimpanan tanpa menunggu mined. Return (tx_hash, nonce)."""
+        raise NotImplementedError
+
+    def receipt(self, tx_hash: str):
+        """None = belum mined, True = sukses, False = revert."""
+        raise NotImplementedError
+
+    def confirmed_nonce(self) -> int:
+        """Jumlah transaksi wallet yang sudah mined."""
+        raise NotImplementedError
+
+    def rebroadcast(self, value: str, nonce: int) -> str:
+        """Tanda tangani ulang & kirim transaksi penyimpanan dengan nonce tertentu. Return tx_hash."""
+        raise NotImplementedError
+
+    def fill_nonce(self, nonce: int) -> str:
+        """Kirim transaksi kosong untuk menutup nonce yang bolong. Return tx_hash."""
+        raise NotImplementedError
+
+    # -------------------------------
+    # READ
+    # -------------------------------
+
+    def verify(self, value: str) -> bool:
+        raise NotImplementedError
+
+    def verify_many(self, values: list) -> list:
+        """Hasil verify untuk setiap value, urutan sama dengan input."""
+        return [self.verify(value) for value in values]
+
+    def block_number(self) -> int:
+        raise NotImplementedError
+
+    def block_hash(self, number: int) -> str:
+        """Hash blok (hex), untuk deteksi reorg oleh chain indexer."""
+        raise NotImplementedError
+
+    def stored_events(self, from_block: int, to_block: int) -> list:
+        """
+        Event CertificateStored di rentang blok (inklusif), urut blok:
+        list dict value, block_number, tx_hash, log_index.
+        """
+        raise NotImplementedError
+
+    # -------------------------------
+    # ASYNC (default: jalankan versi sync di thread)
+    # -------------------------------
+
+    async def verify_async(self, value: str) -> bool:
+        return await asyncio.to_thread(self.verify, value)
+
+    async def verify_many_async(self, values: list) -> list:
+        return await asyncio.to_thread(self.verify_many, values)
+
+    async def close_async(self):
+        pass
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> Ledger:
+    """Ledger aktif sesuai LEDGER_BACKEND, dibuat saat pertama dipakai."""
+    global _ledger
+
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                if LEDGER_BACKEND == "simulated":
+                    from app.ledger_simulated import SimulatedLedger
+                    _ledger = SimulatedLedger()
+                elif LEDGER_BACKEND == "web3":
+                    from app.ledger_web3 import Web3Ledger
+                    _ledger = Web3Ledger()
+                else:
+                    raise ValueError(f"LEDGER_BACKEND tidak dikenal: {LEDGER_BACKEND}")
+
+    return _ledger
+
+
+def set_ledger(ledger: Ledger):
+    """Ganti ledger aktif (dipakai benchmark)."""
+    global _ledger
+
+    with _ledger_lock:
+        _ledger = ledger
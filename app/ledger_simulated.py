@@ -0,0 +1,279 @@
+import os
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+
+from app.ledger import Ledger
+
+
+# ==========================================================
+# CONFIGURATION
+# ==========================================================
+# Ledger lokal pengganti smart contract. Disimpan di SQLite
+# (":memory:" = per proses; path file = bisa dibagi beberapa
+# worker uvicorn) dengan latency buatan per panggilan.
+
+LEDGER_SIM_DB = os.getenv("LEDGER_SIM_DB", ":memory:")
+LEDGER_SIM_LATENCY_MS = float(os.getenv("LEDGER_SIM_LATENCY_MS", "0"))
+# Waktu sampai transaksi dianggap mined
+LEDGER_SIM_CONFIRM_SECONDS = float(os.getenv("LEDGER_SIM_CONFIRM_SECONDS", "0"))
+LEDGER_SIM_BLOCK_SECONDS = float(os.getenv("LEDGER_SIM_BLOCK_SECONDS", "2"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sim_transactions (
+    tx_hash   TEXT PRIMARY KEY,
+    value     TEXT NOT NULL,
+    nonce     INTEGER NOT NULL,
+    success   INTEGER NOT NULL,
+    mined_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_sim_transactions_value ON sim_transactions (value, success);
+CREATE INDEX IF NOT EXISTS ix_sim_transactions_mined_at ON sim_transactions (mined_at);
+CREATE TABLE IF NOT EXISTS sim_meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
+"""
+
+
+class SimulatedLedger(Ledger):
+    """
+    Perilaku mengikuti kontrak: store hash yang sudah tersimpan akan
+    revert, verify hanya True setelah transaksi mined.
+    """
+
+    name = "simulated"
+
+    def __init__(
+        self,
+        path: str = None,
+        latency_ms: float = None,
+        confirm_seconds: float = None,
+        block_seconds: float = None
+    ):
+        self.path = path or LEDGER_SIM_DB
+        self.latency = (LEDGER_SIM_LATENCY_MS if latency_ms is None else latency_ms) / 1000
+        self.confirm_seconds = (
+            LEDGER_SIM_CONFIRM_SECONDS if confirm_seconds is None else confirm_seconds
+        )
+        self.block_seconds = block_seconds or LEDGER_SIM_BLOCK_SECONDS
+        self.calls = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=30
+        )
+        self._conn.executescript(_SCHEMA)
+
+        self.started_at, self.seed = self._load_genesis()
+
+    def _load_genesis(self):
+        """
+        Waktu genesis + seed hash blok disimpan di database ledger:
+        worker lain (dan restart) yang memakai file yang sama melihat
+        nomor & hash blok yang sama. Insert-or-ignore dalam satu
+        statement sehingga hanya pembuat pertama yang menentukan.
+        """
+        self._conn.execute(
+            "INSERT OR IGNORE INTO sim_meta VALUES ('genesis_at', ?), ('seed', ?)",
+            (repr(time.time()), os.urandom(16).hex())
+        )
+
+        meta = dict(self._conn.execute("SELECT key, value FROM sim_meta").fetchall())
+
+        return float(meta["genesis_at"]), meta["seed"]
+
+    # -------------------------------
+    # LATENCY
+    # -------------------------------
+
+    def _delay(self):
+        self.calls += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+    async def _delay_async(self):
+        self.calls += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _next_nonce(self) -> int:
+        # Tidak ada transaksi yang dihapus: rowid terakhir = jumlah transaksi
+        return self._conn.execute(
+            "SELECT COALESCE(MAX(rowid), 0) FROM sim_transactions"
+        ).fetchone()[0]
+
+    def _query(self, sql: str, params: tuple = ()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # -------------------------------
+    # WRITE
+    # -------------------------------
+
+    def store(self, value: str):
+        self._delay()
+
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+
+            try:
+                nonce = self._next_nonce()
+
+                exists = self._conn.execute(
+                    "SELECT 1 FROM sim_transactions WHERE value = ? AND success = 1",
+                    (value,)
+                ).fetchone()
+
+                tx_hash = "0x" + hashlib.sha256(f"{value}:{nonce}".encode()).hexdigest()
+
+                self._conn.execute(
+                    "INSERT INTO sim_transactions VALUES (?, ?, ?, ?, ?)",
+                    (tx_hash, value, nonce, 0 if exists else 1, now + self.confirm_seconds)
+                )
+                self._conn.execute("COMMIT")
+
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return tx_hash, nonce
+
+    def rebroadcast(self, value: str, nonce: int) -> str:
+        # Transaksi simulasi tidak pernah di-drop: kembalikan yang ada
+        rows = self._query(
+            "SELECT tx_hash FROM sim_transactions WHERE value = ? AND nonce = ?",
+            (value, nonce)
+        )
+
+        if rows:
+            self._delay()
+            return rows[0][0]
+
+        return self.store(value)[0]
+
+    def fill_nonce(self, nonce: int) -> str:
+        # Nonce simulasi = urutan transaksi, tidak bisa bolong
+        self._delay()
+        return "0x" + hashlib.sha256(f"fill:{nonce}".encode()).hexdigest()
+
+    def receipt(self, tx_hash: str):
+        self._delay()
+
+        rows = self._query(
+            "SELECT success, mined_at FROM sim_transactions WHERE tx_hash = ?",
+            (tx_hash,)
+        )
+
+        if not rows or rows[0][1] > time.time():
+            return None
+
+        return rows[0][0] == 1
+
+    def confirmed_nonce(self) -> int:
+        self._delay()
+
+        return self._query(
+            "SELECT COUNT(*) FROM sim_transactions WHERE mined_at <= ?",
+            (time.time(),)
+        )[0][0]
+
+    def _block_at(self, timestamp: float) -> int:
+        return max(int((timestamp - self.started_at) / self.block_seconds), 0)
+
+    def block_number(self) -> int:
+        self._delay()
+        return self._block_at(time.time())
+
+    def block_hash(self, number: int) -> str:
+        # Tidak ada reorg: hash blok tetap per database ledger
+        self._delay()
+        return "0x" + hashlib.sha256(f"{self.seed}:{number}".encode()).hexdigest()
+
+    def stored_events(self, from_block: int, to_block: int) -> list:
+        """
+        Blok b >= 1 berisi transaksi dengan mined_at di
+        [start + (b-1) * block_seconds, start + b * block_seconds),
+        sehingga blok <= block_number() sudah lengkap saat di-index.
+        Transaksi sebelum ledger dibuat (seed_anchored) ada di blok 0.
+        """
+        self._delay()
+
+        lower = self.started_at + (from_block - 1) * self.block_seconds
+        upper = self.started_at + to_block * self.block_seconds
+
+        rows = self._query(
+            "SELECT tx_hash, value, mined_at FROM sim_transactions "
+            "WHERE success = 1 AND mined_at >= ? AND mined_at < ? "
+            "ORDER BY mined_at, rowid",
+            (lower if from_block > 0 else float("-inf"), upper)
+        )
+
+        return [
+            {
+                "value": value,
+                "block_number": self._block_at(mined_at) + 1 if mined_at >= self.started_at else 0,
+                "tx_hash": tx_hash,
+                "log_index": index
+            }
+            for index, (tx_hash, value, mined_at) in enumerate(rows)
+        ]
+
+    def seed_anchored(self, values):
+        """Tandai banyak value sebagai sudah tersimpan & mined (benchmark / test)."""
+        with self._lock:
+            nonce = self._next_nonce()
+
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO sim_transactions VALUES (?, ?, ?, 1, 0)",
+                (
+                    ("0x" + hashlib.sha256(f"{value}:{n}".encode()).hexdigest(), value, n)
+                    for n, value in enumerate(values, start=nonce)
+                )
+            )
+            self._conn.execute("COMMIT")
+
+    # -------------------------------
+    # READ
+    # -------------------------------
+
+    def _verify_many(self, values: list) -> list:
+        if not values:
+            return []
+
+        placeholders = ",".join("?" * len(values))
+        rows = self._query(
+            f"SELECT DISTINCT value FROM sim_transactions "
+            f"WHERE success = 1 AND mined_at <= ? AND value IN ({placeholders})",
+            (time.time(), *values)
+        )
+        anchored = {row[0] for row in rows}
+
+        return [value in anchored for value in values]
+
+    def verify(self, value: str) -> bool:
+        self._delay()
+        return self._verify_many([value])[0]
+
+    def verify_many(self, values: list) -> list:
+        # Satu batch = satu round trip, seperti JSON-RPC batch
+        self._delay()
+        return self._verify_many(values)
+
+    async def verify_async(self, value: str) -> bool:
+        await self._delay_async()
+        return self._verify_many([value])[0]
+
+    async def verify_many_async(self, values: list) -> list:
+        await self._delay_async()
+        return self._verify_many(values)
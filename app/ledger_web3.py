@@ -0,0 +1,378 @@
+import os
+import asyncio
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from web3 import Web3, AsyncWeb3
+from web3.exceptions import TransactionNotFound
+from dotenv import load_dotenv
+
+from app.ledger import Ledger, ChainUnavailable
+from app.nonce_manager import allocate_nonce, resync_nonce, release_nonce
+
+# =============================
+# LOAD ENVIRONMENT VARIABLES
+# =============================
+load_dotenv()
+
+PRIVATE_KEY = os.getenv("PRIVATE_KEY")
+WALLET_ADDRESS = os.getenv("WALLET_ADDRESS")
+CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
+RPC_URL = os.getenv("RPC_URL")
+
+CHAIN_ID = int(os.getenv("CHAIN_ID", "80002"))  # Polygon Amoy
+
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", "100"))
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "10"))
+
+# Jumlah eth_call maksimum dalam satu JSON-RPC batch
+RPC_BATCH_SIZE = int(os.getenv("RPC_BATCH_SIZE", "50"))
+
+NONCE_MAX_RETRIES = int(os.getenv("NONCE_MAX_RETRIES", "3"))
+
+GAS_LIMIT = 200000
+GAS_PRICE_GWEI = 30
+
+# Kirim ulang transaksi macet: gas price minimal +10% agar node
+# menerima sebagai pengganti transaksi dengan nonce yang sama
+REBROADCAST_GAS_MULTIPLIER = 1.125
+
+# Pesan error node yang menandakan nonce bentrok / sudah terpakai
+NONCE_ERRORS = (
+    "nonce too low",
+    "already known",
+    "replacement transaction underpriced",
+)
+
+
+# =============================
+# VALIDATION
+# =============================
+# Tidak dilakukan saat import: aplikasi tetap bisa start (dan
+# verifikasi jalan dalam mode DB-only) tanpa RPC.
+def _require(*names):
+    values = {
+        "PRIVATE_KEY": PRIVATE_KEY,
+        "WALLET_ADDRESS": WALLET_ADDRESS,
+        "CONTRACT_ADDRESS": CONTRACT_ADDRESS,
+        "RPC_URL": RPC_URL,
+    }
+
+    for name in names:
+        if not values[name]:
+            raise ChainUnavailable(f"{name} tidak ditemukan di .env")
+
+
+# =============================
+# SMART CONTRACT ABI
+# =============================
+contract_abi = [
+    {
+        "inputs": [{"internalType": "string", "name": "_hash", "type": "string"}],
+        "name": "storeCertificate",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "string", "name": "_hash", "type": "string"}],
+        "name": "verifyCertificate",
+        "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "anonymous": False,
+        "inputs": [{"indexed": False, "internalType": "string", "name": "_hash", "type": "string"}],
+        "name": "CertificateStored",
+        "type": "event"
+    }
+]
+
+
+def _is_nonce_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(text in message for text in NONCE_ERRORS)
+
+
+# =============================
+# WEB3 LEDGER
+# =============================
+
+class Web3Ledger(Ledger):
+
+    name = "web3"
+
+    def __init__(self):
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._async_client = None
+        self._async_client_lock = None
+
+    # -------------------------------
+    # CLIENT (LAZY)
+    # -------------------------------
+    # Dibuat saat pertama dipakai, tanpa round trip is_connected().
+    # Koneksi HTTP di-pool (requests.Session) dan retry bawaan
+    # provider dimatikan: kegagalan RPC ditangani health probe.
+
+    def get_client(self):
+        """Return (w3, contract)."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    _require("RPC_URL", "CONTRACT_ADDRESS")
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_maxsize=RPC_POOL_SIZE)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+
+                    w3 = Web3(Web3.HTTPProvider(
+                        RPC_URL,
+                        request_kwargs={"timeout": RPC_TIMEOUT},
+                        session=session,
+                        exception_retry_configuration=None
+                    ))
+
+                    contract = w3.eth.contract(
+                        address=Web3.to_checksum_address(CONTRACT_ADDRESS),
+                        abi=contract_abi
+                    )
+
+                    self._client = (w3, contract)
+
+        return self._client
+
+    async def get_async_client(self):
+        """
+        Return (async_w3, async_contract). Session aiohttp di-pool dan
+        dipakai ulang untuk semua request dalam satu event loop.
+        """
+        if self._async_client is not None:
+            return self._async_client
+
+        if self._async_client_lock is None:
+            self._async_client_lock = asyncio.Lock()
+
+        async with self._async_client_lock:
+            if self._async_client is None:
+                _require("RPC_URL", "CONTRACT_ADDRESS")
+
+                async_w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(
+                    RPC_URL,
+                    exception_retry_configuration=None
+                ))
+
+                session = ClientSession(
+                    connector=TCPConnector(limit=RPC_POOL_SIZE),
+                    timeout=ClientTimeout(total=RPC_TIMEOUT)
+                )
+                await async_w3.provider.cache_async_session(session)
+
+                async_contract = async_w3.eth.contract(
+                    address=Web3.to_checksum_address(CONTRACT_ADDRESS),
+                    abi=contract_abi
+                )
+
+                self._async_client = (async_w3, async_contract)
+
+        return self._async_client
+
+    async def close_async(self):
+        if self._async_client is not None:
+            await self._async_client[0].provider.disconnect()
+
+        self._async_client = None
+        self._async_client_lock = None
+
+    # -------------------------------
+    # NONCE
+    # -------------------------------
+
+    def pending_nonce(self) -> int:
+        w3, _ = self.get_client()
+        return w3.eth.get_transaction_count(WALLET_ADDRESS, "pending")
+
+    def confirmed_nonce(self) -> int:
+        w3, _ = self.get_client()
+        return w3.eth.get_transaction_count(WALLET_ADDRESS, "latest")
+
+    # -------------------------------
+    # SEND TRANSACTION (NON-BLOCKING)
+    # -------------------------------
+
+    def _send(self, txn: dict) -> str:
+        w3, _ = self.get_client()
+
+        signed_txn = w3.eth.account.sign_transaction(
+            txn,
+            private_key=PRIVATE_KEY
+        )
+
+        return w3.to_hex(w3.eth.send_raw_transaction(signed_txn.raw_transaction))
+
+    def _store_txn(self, value: str, nonce: int, gas_price: int) -> dict:
+        _, contract = self.get_client()
+
+        return contract.functions.storeCertificate(
+            value
+        ).build_transaction({
+            "chainId": CHAIN_ID,
+            "gas": GAS_LIMIT,
+            "gasPrice": gas_price,
+            "nonce": nonce,
+        })
+
+    def _rebroadcast_gas_price(self) -> int:
+        w3, _ = self.get_client()
+        base = max(w3.to_wei(GAS_PRICE_GWEI, "gwei"), w3.eth.gas_price)
+
+        return int(base * REBROADCAST_GAS_MULTIPLIER)
+
+    def store(self, value: str):
+        """
+        Kirim transaksi storeCertificate tanpa menunggu mined.
+
+        Nonce diambil dari nonce_manager (dibagi antar thread & proses),
+        sehingga beberapa transaksi bisa in-flight bersamaan.
+        """
+        _require("PRIVATE_KEY", "WALLET_ADDRESS")
+        w3, _ = self.get_client()
+
+        for attempt in range(NONCE_MAX_RETRIES):
+            nonce = allocate_nonce(WALLET_ADDRESS, self.pending_nonce)
+
+            try:
+                tx_hash = self._send(
+                    self._store_txn(value, nonce, w3.to_wei(GAS_PRICE_GWEI, "gwei"))
+                )
+            except Exception as e:
+                # Nonce tidak terpakai -> sinkronkan ulang agar gap terisi
+                try:
+                    resync_nonce(WALLET_ADDRESS, self.pending_nonce, released_nonce=nonce)
+                except Exception as resync_error:
+                    # RPC mati: kembalikan nonce tanpa chain agar counter
+                    # tidak tertinggal di depan chain
+                    print("NONCE RESYNC ERROR:", str(resync_error))
+                    release_nonce(WALLET_ADDRESS, nonce)
+
+                if _is_nonce_error(e) and attempt < NONCE_MAX_RETRIES - 1:
+                    continue
+
+                raise
+
+            return tx_hash, nonce
+
+    def rebroadcast(self, value: str, nonce: int) -> str:
+        _require("PRIVATE_KEY", "WALLET_ADDRESS")
+
+        return self._send(self._store_txn(value, nonce, self._rebroadcast_gas_price()))
+
+    def fill_nonce(self, nonce: int) -> str:
+        _require("PRIVATE_KEY", "WALLET_ADDRESS")
+
+        return self._send({
+            "chainId": CHAIN_ID,
+            "to": Web3.to_checksum_address(WALLET_ADDRESS),
+            "value": 0,
+            "gas": 21000,
+            "gasPrice": self._rebroadcast_gas_price(),
+            "nonce": nonce,
+        })
+
+    def receipt(self, tx_hash: str):
+        w3, _ = self.get_client()
+
+        try:
+            receipt = w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+
+        return receipt.status == 1
+
+    def block_number(self) -> int:
+        w3, _ = self.get_client()
+        return w3.eth.block_number
+
+    def block_hash(self, number: int) -> str:
+        w3, _ = self.get_client()
+        return w3.to_hex(w3.eth.get_block(number)["hash"])
+
+    def stored_events(self, from_block: int, to_block: int) -> list:
+        w3, contract = self.get_client()
+
+        logs = contract.events.CertificateStored().get_logs(
+            from_block=from_block,
+            to_block=to_block
+        )
+
+        return [
+            {
+                "value": log["args"]["_hash"],
+                "block_number": log["blockNumber"],
+                "tx_hash": w3.to_hex(log["transactionHash"]),
+                "log_index": log["logIndex"]
+            }
+            for log in logs
+        ]
+
+    # -------------------------------
+    # VERIFY
+    # -------------------------------
+
+    def verify(self, value: str) -> bool:
+        _, contract = self.get_client()
+        return contract.functions.verifyCertificate(value).call()
+
+    def verify_many(self, values: list) -> list:
+        """eth_call dikirim sebagai JSON-RPC batch (maks RPC_BATCH_SIZE per request)."""
+        w3, contract = self.get_client()
+        results = []
+
+        for start in range(0, len(values), RPC_BATCH_SIZE):
+            chunk = values[start:start + RPC_BATCH_SIZE]
+
+            try:
+                with w3.batch_requests() as batch:
+                    for value in chunk:
+                        batch.add(contract.functions.verifyCertificate(value))
+
+                    responses = batch.execute()
+
+            except Exception as e:
+                # Node tidak mendukung batch -> fallback satu per satu
+                print("BLOCKCHAIN BATCH VERIFY ERROR:", str(e))
+                responses = [self.verify(value) for value in chunk]
+
+            results.extend(result is True for result in responses)
+
+        return results
+
+    async def verify_async(self, value: str) -> bool:
+        _, async_contract = await self.get_async_client()
+        return await async_contract.functions.verifyCertificate(value).call()
+
+    async def verify_many_async(self, values: list) -> list:
+        async_w3, async_contract = await self.get_async_client()
+        results = []
+
+        for start in range(0, len(values), RPC_BATCH_SIZE):
+            chunk = values[start:start + RPC_BATCH_SIZE]
+
+            try:
+                async with async_w3.batch_requests() as batch:
+                    for value in chunk:
+                        batch.add(async_contract.functions.verifyCertificate(value))
+
+                    responses = await batch.async_execute()
+
+            except Exception as e:
+                print("BLOCKCHAIN BATCH VERIFY ERROR:", str(e))
+                responses = [await self.verify_async(value) for value in chunk]
+
+            results.extend(result is True for result in responses)
+
+        return results
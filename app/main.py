@@ -1,23 +1,98 @@
 import os
-from math import ceil
-
-from fastapi import FastAPI, Request, Form, Depends, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse
+import calendar
+
+from fastapi import FastAPI, Request, Form, Depends, HTTPException, UploadFile, File
+from fastapi.responses import (
+    HTMLResponse,
+    RedirectResponse,
+    FileResponse,
+    JSONResponse,
+    Response
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
 
-from app.database import engine, SessionLocal
-from app.models import Base, Certificate, AuditLog
+from sqlalchemy import select
+
+from app.database import (
+    engine,
+    SessionLocal,
+    ReadSessionLocal,
+    AsyncReadSessionLocal,
+    async_engine
+)
+from app.models import Certificate, AuditLog, AnchorQueue
 from app.auth import (
     login_required,
     authenticate_admin,
     role_required,
-    create_audit_log
+    create_audit_log,
+    create_audit_log_async
+)
+from app.certificate_service import generate_certificate, fields_from_certificate
+from app.certificate_renderer import CERT_DIR, remove_certificate_files
+from app.pdf_cache import pdf_cache, render_on_demand
+from app.storage import object_path, object_exists, remove_object
+from app.downloads import file_download, bytes_download
+from app.signing import public_key_info, key_id, SigningKeyNotConfigured
+from app.qr_payload import check_signing_config
+from app.snapshot import (
+    KIND_CERTIFICATES,
+    KIND_REVOCATIONS,
+    record_snapshot_change,
+    snapshot_cache,
+    snapshot_manifest,
+    build_delta
+)
+from app.bulk_issuance import parse_rows, start_bulk_job, get_job as get_bulk_job, BULK_MAX_ROWS
+from app.schemas import (
+    VerifyRequest,
+    VerifyResponse,
+    VerifyBatchRequest,
+    VerifyBatchResponse,
+    VerifySignedRequest,
+    VerifySignedResponse,
+    VerifySignedBatchRequest,
+    VerifySignedBatchResponse
+)
+from app.verification import (
+    is_certificate_anchored_async,
+    verify_certificates_on_chain_async,
+    build_verify_response,
+    not_found_response,
+    invalid_hash_response,
+    normalize_hash,
+    verify_signed_payload
+)
+from app.rate_limit import verify_limiter
+from app.singleflight import SingleFlight
+from app.anchoring import start_anchor_worker, stop_anchor_worker
+from app.chain_indexer import start_chain_indexer, stop_chain_indexer
+from app.blockchain import (
+    close_async_client,
+    start_health_probe,
+    stop_health_probe,
+    chain_health,
+    chain_status
+)
+from app.audit import audit_sink
+from app.migrations import init_database
+from app.audit_retention import start_audit_retention, stop_audit_retention
+from app.metrics import (
+    MetricsMiddleware,
+    render_metrics,
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    VERIFY_COALESCED,
+    VERIFY_REJECTED
+)
+from app.search import apply_search
+from app.pagination import keyset_page, cached_count
+from app.stats import (
+    get_dashboard_stats,
+    record_revoked,
+    record_deleted
 )
-from app.certificate_service import generate_certificate
-from app.schemas import VerifyRequest, VerifyResponse
-from app.blockchain import verify_certificate_on_chain
 from datetime import datetime
 
 
@@ -36,90 +111,339 @@ app.add_middleware(
     secret_key="super-secret-key-skripsi"
 )
 
+app.add_middleware(MetricsMiddleware)
+
 templates = Jinja2Templates(directory="templates")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-Base.metadata.create_all(bind=engine)
+# Jumlah hash maksimum untuk POST /verify/batch
+VERIFY_BATCH_MAX = int(os.getenv("VERIFY_BATCH_MAX", "100"))
+
+# Jumlah payload maksimum untuk POST /verify/signed/batch (tanpa I/O)
+VERIFY_SIGNED_BATCH_MAX = int(os.getenv("VERIFY_SIGNED_BATCH_MAX", "1000"))
+
+# /verify konkuren untuk hash yang sama berbagi satu query DB + cek chain
+verify_flight = SingleFlight()
+VERIFY_COALESCED.set_function(lambda: verify_flight.shared)
+
+init_database(engine)
+
+
+@app.exception_handler(SigningKeyNotConfigured)
+def signing_key_not_configured(request: Request, exc: SigningKeyNotConfigured):
+    return JSONResponse({"detail": str(exc)}, status_code=503)
+
+
+@app.on_event("startup")
+def startup():
+    # Gagal start jika QR_FORMAT=signed tanpa kunci penerbit
+    check_signing_config()
+
+    audit_sink.start()
+    start_health_probe()
+    start_anchor_worker()
+    start_chain_indexer()
+    start_audit_retention()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    stop_audit_retention()
+    stop_chain_indexer()
+    stop_anchor_worker()
+    stop_health_probe()
+    audit_sink.stop()
+    await close_async_client()
+    await async_engine.dispose()
 
 
 # ==========================================================
 # ===================== ANDROID API ========================
 # ==========================================================
 
-@app.post("/verify", response_model=VerifyResponse)
-def verify_certificate(payload: VerifyRequest, request: Request):
+@app.get("/health")
+def health():
+    return {
+        "status": "ok",
+        "chain": chain_status(),
+        "chain_health": chain_health
+    }
 
-    db = SessionLocal()
 
-    cert = db.query(Certificate).filter(
-        Certificate.certificate_hash == payload.certificate_hash
-    ).first()
+@app.get("/metrics")
+def metrics():
+    # Format teks Prometheus; nilai per proses worker
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
 
-    if not cert:
-        db.close()
-        return VerifyResponse(
-            valid=False,
-            message="Sertifikat tidak valid",
-            data=None,
-            blockchain_registered=False
+
+def check_rate_limit(request: Request, cost: int = 1):
+    """Token bucket per IP client (cost token per request); 429 + Retry-After jika habis."""
+    retry_after = verify_limiter.acquire(request.client.host, cost)
+
+    if retry_after:
+        VERIFY_REJECTED.inc(reason="rate_limited")
+        raise HTTPException(
+            status_code=429,
+            detail="Terlalu banyak request, coba lagi nanti",
+            headers={"Retry-After": str(max(int(retry_after + 0.999), 1))}
         )
 
-    try:
-        blockchain_status = verify_certificate_on_chain(
-            payload.certificate_hash
+
+async def resolve_verification(certificate_hash: str):
+    """Query Certificate + status chain; None jika tidak ditemukan."""
+    async with AsyncReadSessionLocal() as db:
+
+        result = await db.execute(
+            select(Certificate).where(
+                Certificate.certificate_hash == certificate_hash
+            )
         )
-    except Exception:
-        blockchain_status = False
+        cert = result.scalars().first()
 
-    # 🔎 Audit log untuk akses publik (Android)
-    create_audit_log(
-        db=db,
+        if not cert:
+            return None
+
+        try:
+            blockchain_status = await is_certificate_anchored_async(cert, db)
+        except Exception:
+            # Mode DB-only
+            blockchain_status = None
+
+        return build_verify_response(cert, blockchain_status)
+
+
+@app.post("/verify", response_model=VerifyResponse)
+async def verify_certificate(payload: VerifyRequest, request: Request):
+
+    check_rate_limit(request)
+
+    certificate_hash = normalize_hash(payload.certificate_hash)
+
+    if certificate_hash is None:
+        VERIFY_REJECTED.inc(reason="invalid_hash")
+        return invalid_hash_response()
+
+    response = await verify_flight.do(
+        certificate_hash,
+        lambda: resolve_verification(certificate_hash)
+    )
+
+    if response is None:
+        return not_found_response()
+
+    # 🔎 Audit log untuk akses publik (Android), tetap per request
+    await create_audit_log_async(
+        db=None,
         admin_id=None,
         action="VERIFY_API",
-        description=f"Verify hash: {payload.certificate_hash}",
+        description=f"Verify hash: {certificate_hash}",
         ip_address=request.client.host
     )
 
-    response = VerifyResponse(
-    valid=True,
-    message="Sertifikat ditemukan",
-    data={
-        "certificate_id": cert.certificate_id,
-        "name": cert.name,
-        "nim": cert.nim,
-        "program_studi": cert.program_studi,
-        "institusi": cert.institusi,
-        "issue_date": cert.issue_date,
-        "blockchain_verified": blockchain_status,
-        "transaction_hash": cert.blockchain_tx,
-        "explorer_url": f"https://amoy.polygonscan.com/tx/{cert.blockchain_tx}"
-        if cert.blockchain_tx else None,
-        "is_revoked": cert.is_revoked,
-        "revoked_reason": cert.revoked_reason
-    },
-    blockchain_registered=blockchain_status
-)
-
-    db.close()
     return response
 
 
+@app.post("/verify/batch", response_model=VerifyBatchResponse)
+async def verify_certificate_batch(payload: VerifyBatchRequest, request: Request):
+
+    requested = list(dict.fromkeys(payload.certificate_hashes))
+
+    if len(requested) > VERIFY_BATCH_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maksimal {VERIFY_BATCH_MAX} hash per request"
+        )
+
+    # Satu token per hash: batch tidak boleh melipatgandakan jatah lookup
+    check_rate_limit(request, cost=max(len(requested), 1))
+
+    normalized = {value: normalize_hash(value) for value in requested}
+    hashes = list(dict.fromkeys(h for h in normalized.values() if h))
+
+    async with AsyncReadSessionLocal() as db:
+
+        certs = []
+
+        if hashes:
+            result = await db.execute(
+                select(Certificate).where(
+                    Certificate.certificate_hash.in_(hashes)
+                )
+            )
+            certs = result.scalars().all()
+
+        try:
+            blockchain_status = await verify_certificates_on_chain_async(certs, db)
+        except Exception:
+            blockchain_status = {}
+
+        await create_audit_log_async(
+            db=db,
+            admin_id=None,
+            action="VERIFY_API",
+            description=f"Verify batch: {len(requested)} hash",
+            ip_address=request.client.host
+        )
+
+    certs_by_hash = {cert.certificate_hash: cert for cert in certs}
+    results = {}
+
+    # Key hasil = hash persis seperti yang dikirim client
+    for value, certificate_hash in normalized.items():
+        cert = certs_by_hash.get(certificate_hash)
+
+        if certificate_hash is None:
+            VERIFY_REJECTED.inc(reason="invalid_hash")
+            results[value] = invalid_hash_response()
+        elif not cert:
+            results[value] = not_found_response()
+        else:
+            results[value] = build_verify_response(
+                cert,
+                blockchain_status.get(certificate_hash)
+            )
+
+    return VerifyBatchResponse(results=results)
+
+
+@app.post("/verify/signed", response_model=VerifySignedResponse)
+async def verify_signed(payload: VerifySignedRequest):
+    # QR_FORMAT=signed: cukup tanda tangan penerbit, tanpa database / RPC.
+    # Satu verifikasi Ed25519 (~puluhan mikrodetik) -> langsung di event loop
+    return verify_signed_payload(payload.payload)
+
+
+@app.post("/verify/signed/batch", response_model=VerifySignedBatchResponse)
+def verify_signed_batch(payload: VerifySignedBatchRequest):
+    # Batch besar dijalankan di threadpool (def biasa) agar event loop tidak tertahan
+
+    if len(payload.payloads) > VERIFY_SIGNED_BATCH_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maksimal {VERIFY_SIGNED_BATCH_MAX} payload per request"
+        )
+
+    return VerifySignedBatchResponse(
+        results=[verify_signed_payload(text) for text in payload.payloads]
+    )
+
+
+# ==========================================================
+# ================= OFFLINE SNAPSHOT (PUBLIC) ==============
+# ==========================================================
+
+@app.get("/issuer-key")
+def issuer_key():
+    return public_key_info()
+
+
+@app.get("/snapshot")
+def snapshot():
+    db = ReadSessionLocal()
+
+    try:
+        return snapshot_manifest(db)
+    finally:
+        db.close()
+
+
+def _snapshot_download(request: Request, kind: int, name: str):
+    db = ReadSessionLocal()
+
+    try:
+        version, data = snapshot_cache.get(db, kind)
+    finally:
+        db.close()
+
+    return bytes_download(
+        request,
+        data,
+        # Ganti kunci penerbit -> signature berubah walau versi sama
+        f'"{name}-{version}-{key_id()}"',
+        f"{name}-{version}.bin",
+        media_type="application/octet-stream"
+    )
+
+
+@app.get("/snapshot/certificates")
+def snapshot_certificates(request: Request):
+    return _snapshot_download(request, KIND_CERTIFICATES, "certificates")
+
+
+@app.get("/snapshot/revocations")
+def snapshot_revocations(request: Request):
+    return _snapshot_download(request, KIND_REVOCATIONS, "revocations")
+
+
+@app.get("/snapshot/delta")
+def snapshot_delta(since: int):
+    db = ReadSessionLocal()
+
+    try:
+        delta = build_delta(db, since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        db.close()
+
+    if delta is None:
+        raise HTTPException(
+            status_code=410,
+            detail="Terlalu banyak perubahan, unduh snapshot penuh"
+        )
+
+    return delta
+
+
 # ==========================================================
 # ===================== DOWNLOAD (PUBLIC) ==================
 # ==========================================================
 
 @app.get("/download-certificate/{certificate_id}")
-def download_certificate(certificate_id: str):
+def download_certificate(request: Request, certificate_id: str):
+
+    filename = f"{certificate_id}.pdf"
+
+    db = ReadSessionLocal()
+
+    try:
+        cert = db.query(Certificate).filter(
+            Certificate.certificate_id == certificate_id
+        ).first()
+    finally:
+        db.close()
+
+    # Object content-addressed (ETag = sha256 isi, immutable)
+    if cert and object_exists(cert.pdf_sha256):
+        return file_download(
+            request,
+            object_path(cert.pdf_sha256),
+            f'"{cert.pdf_sha256}"',
+            filename
+        )
 
-    file_path = f"certificates/{certificate_id}.pdf"
+    # File lama di direktori datar (belum dimigrasi)
+    legacy_path = os.path.join(CERT_DIR, filename)
 
-    if not os.path.exists(file_path):
+    if cert and os.path.exists(legacy_path):
+        return FileResponse(
+            path=legacy_path,
+            media_type="application/pdf",
+            filename=filename
+        )
+
+    if not cert or not render_on_demand():
         raise HTTPException(status_code=404, detail="File tidak ditemukan")
 
-    return FileResponse(
-        path=file_path,
-        media_type="application/pdf",
-        filename=f"{certificate_id}.pdf"
+    # Render dari baris Certificate, hasil di-cache (memori + disk)
+    digest, data = pdf_cache.get_or_render(fields_from_certificate(cert))
+
+    return bytes_download(
+        request,
+        data,
+        f'"{digest}"',
+        filename,
+        last_modified=calendar.timegm(cert.created_at.utctimetuple())
     )
 
 
@@ -195,15 +519,9 @@ def dashboard(
     if auth:
         return auth
 
-    db = SessionLocal()
-
-    total_certificates = db.query(Certificate).count()
+    db = ReadSessionLocal()
 
-    total_blockchain = (
-        db.query(Certificate)
-        .filter(Certificate.blockchain_tx.isnot(None))
-        .count()
-    )
+    stats = get_dashboard_stats(db)
 
     db.close()
 
@@ -212,8 +530,11 @@ def dashboard(
         {
             "request": request,
             "title": "Dashboard",
-            "total_certificates": total_certificates,
-            "total_blockchain": total_blockchain
+            "total_certificates": stats["total"],
+            "total_blockchain": stats["anchored"],
+            "total_revoked": stats["revoked"],
+            "per_institusi": stats["per_institusi"],
+            "per_program_studi": stats["per_program_studi"]
         }
     )
 
@@ -275,6 +596,62 @@ def generate_submit(
     )
 
 
+# ==========================================================
+# ====================== BULK GENERATE ======================
+# ==========================================================
+
+@app.post("/bulk-generate")
+async def bulk_generate_submit(
+    request: Request,
+    file: UploadFile = File(...),
+    auth=Depends(login_required)
+):
+    if auth:
+        return auth
+
+    try:
+        rows = parse_rows(await file.read(), file.filename or "")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not rows:
+        raise HTTPException(status_code=400, detail="File tidak berisi data")
+
+    if len(rows) > BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maksimal {BULK_MAX_ROWS} baris per file"
+        )
+
+    job = start_bulk_job(rows)
+
+    await create_audit_log_async(
+        db=None,
+        admin_id=request.session.get("admin_id"),
+        action="BULK_GENERATE_CERTIFICATE",
+        description=f"Bulk generate {len(rows)} baris dari {file.filename} (job {job.job_id})",
+        ip_address=request.client.host
+    )
+
+    return JSONResponse(job.to_dict(), status_code=202)
+
+
+@app.get("/bulk-generate/{job_id}")
+def bulk_generate_status(
+    job_id: str,
+    auth=Depends(login_required)
+):
+    if auth:
+        return auth
+
+    job = get_bulk_job(job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan")
+
+    return job.to_dict()
+
+
 # ==========================================================
 # ====================== LIST CERTIFICATE ===================
 # ==========================================================
@@ -282,31 +659,37 @@ def generate_submit(
 @app.get("/certificates", response_class=HTMLResponse)
 def list_certificates(
     request: Request,
-    page: int = 1,
+    cursor: str = "",
+    direction: str = "next",
+    q: str = "",
     nim: str = "",
+    status: str = "",
     auth=Depends(login_required)
 ):
     if auth:
         return auth
 
-    db = SessionLocal()
+    # `nim` dipertahankan untuk link lama
+    q = (q or nim).strip()
+
+    db = ReadSessionLocal()
 
     query = db.query(Certificate)
 
-    if nim:
-        query = query.filter(Certificate.nim.ilike(f"%{nim}%"))
+    if q:
+        query = apply_search(query, q)
 
-    total = query.count()
+    if status == "active":
+        query = query.filter(Certificate.is_revoked.isnot(True))
+    elif status == "revoked":
+        query = query.filter(Certificate.is_revoked.is_(True))
+
+    total = cached_count(f"certificates:{q}:{status}", query)
 
     per_page = 5
-    total_pages = ceil(total / per_page) if total > 0 else 1
-
-    certificates = (
-        query
-        .order_by(Certificate.created_at.desc())
-        .offset((page - 1) * per_page)
-        .limit(per_page)
-        .all()
+
+    certificates, next_cursor, prev_cursor = keyset_page(
+        query, Certificate, per_page, cursor, direction
     )
 
     db.close()
@@ -317,9 +700,10 @@ def list_certificates(
             "request": request,
             "title": "Daftar Sertifikat",
             "certificates": certificates,
-            "page": page,
-            "total_pages": total_pages,
-            "search_nim": nim,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+            "search_q": q,
+            "search_status": status,
             "total_data": total
         }
     )
@@ -348,15 +732,21 @@ def delete_certificate(
         db.close()
         raise HTTPException(status_code=404, detail="Sertifikat tidak ditemukan")
 
-    pdf_path = f"certificates/{certificate_id}.pdf"
-    qr_path = f"certificates/{certificate_id}_qr.png"
+    pdf_sha256 = cert.pdf_sha256
 
-    if os.path.exists(pdf_path):
-        os.remove(pdf_path)
+    shared = db.query(Certificate).filter(
+        Certificate.pdf_sha256 == pdf_sha256,
+        Certificate.id != cert.id
+    ).count() if pdf_sha256 else 0
 
-    if os.path.exists(qr_path):
-        os.remove(qr_path)
+    # Batalkan anchoring yang belum sempat dikirim
+    db.query(AnchorQueue).filter(
+        AnchorQueue.certificate_hash == cert.certificate_hash,
+        AnchorQueue.status == "PENDING"
+    ).delete()
 
+    record_deleted(db, cert)
+    record_snapshot_change(db, "remove", [cert.certificate_hash])
     db.delete(cert)
 
     create_audit_log(
@@ -367,8 +757,18 @@ def delete_certificate(
         ip_address=request.client.host
     )
 
-    db.commit()
-    db.close()
+    try:
+        db.commit()
+    finally:
+        db.close()
+
+    # File & object dihapus SETELAH commit: jika commit gagal, baris
+    # sertifikat tetap punya PDF-nya
+    remove_certificate_files(certificate_id)
+    pdf_cache.invalidate(certificate_id)
+
+    if not shared:
+        remove_object(pdf_sha256)
 
     return RedirectResponse("/certificates", status_code=302)
 
@@ -380,24 +780,20 @@ def delete_certificate(
 @app.get("/audit-logs", response_class=HTMLResponse)
 def view_audit_logs(
     request: Request,
-    page: int = 1,
+    cursor: str = "",
+    direction: str = "next",
     auth=Depends(role_required(["SUPERADMIN"]))
 ):
     if auth:
         return auth
 
-    db = SessionLocal()
+    db = ReadSessionLocal()
 
     per_page = 10
-    total = db.query(AuditLog).count()
-    total_pages = ceil(total / per_page) if total > 0 else 1
-
-    logs = (
-        db.query(AuditLog)
-        .order_by(AuditLog.created_at.desc())
-        .offset((page - 1) * per_page)
-        .limit(per_page)
-        .all()
+    total = cached_count("audit_logs", db.query(AuditLog))
+
+    logs, next_cursor, prev_cursor = keyset_page(
+        db.query(AuditLog), AuditLog, per_page, cursor, direction
     )
 
     db.close()
@@ -408,8 +804,9 @@ def view_audit_logs(
             "request": request,
             "title": "Audit Logs",
             "logs": logs,
-            "page": page,
-            "total_pages": total_pages
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+            "total_data": total
         }
     )
 
@@ -433,6 +830,10 @@ def revoke_certificate(
         db.close()
         raise HTTPException(status_code=404, detail="Sertifikat tidak ditemukan")
 
+    if not cert.is_revoked:
+        record_revoked(db, cert)
+        record_snapshot_change(db, "revoke", [cert.certificate_hash])
+
     cert.is_revoked = True
     cert.revoked_at = datetime.utcnow()
     cert.revoked_reason = reason
@@ -0,0 +1,92 @@
+import hashlib
+
+
+# ===============================
+# MERKLE TREE (SHA-256)
+# ===============================
+#
+# Leaf  = sha256(0x00 || certificate_hash_bytes)
+# Node  = sha256(0x01 || left || right)
+#
+# Prefix berbeda untuk leaf dan node mencegah second-preimage attack.
+# Jika jumlah node ganjil, node terakhir dinaikkan apa adanya ke level
+# berikutnya (tidak diduplikasi).
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(certificate_hash: str) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + bytes.fromhex(certificate_hash)).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def build_merkle_tree(certificate_hashes: list) -> list:
+    """
+    Bangun seluruh level tree.
+    levels[0] = leaves, levels[-1] = [root]
+    """
+    if not certificate_hashes:
+        raise ValueError("Merkle tree membutuhkan minimal satu hash")
+
+    levels = [[leaf_hash(h) for h in certificate_hashes]]
+
+    while len(levels[-1]) > 1:
+        current = levels[-1]
+        parent = []
+
+        for i in range(0, len(current), 2):
+            if i + 1 < len(current):
+                parent.append(node_hash(current[i], current[i + 1]))
+            else:
+                parent.append(current[i])
+
+        levels.append(parent)
+
+    return levels
+
+
+def merkle_root(levels: list) -> str:
+    return levels[-1][0].hex()
+
+
+def merkle_proof(levels: list, index: int) -> list:
+    """
+    Proof untuk leaf ke-`index`, urut dari bawah ke atas.
+    Setiap langkah: {"position": "left" | "right", "hash": <hex>}
+    """
+    proof = []
+
+    for level in levels[:-1]:
+        sibling = index ^ 1
+
+        if sibling < len(level):
+            proof.append({
+                "position": "left" if sibling < index else "right",
+                "hash": level[sibling].hex()
+            })
+
+        index //= 2
+
+    return proof
+
+
+def verify_merkle_proof(certificate_hash: str, proof: list, root: str) -> bool:
+    try:
+        current = leaf_hash(certificate_hash)
+
+        for step in proof:
+            sibling = bytes.fromhex(step["hash"])
+
+            if step["position"] == "left":
+                current = node_hash(sibling, current)
+            else:
+                current = node_hash(current, sibling)
+
+        return current.hex() == root
+
+    except (ValueError, KeyError, TypeError):
+        return False
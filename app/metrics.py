@@ -0,0 +1,368 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+
+# ==========================================================
+# CONFIGURATION
+# ==========================================================
+# Metrics in-process dalam format teks Prometheus (GET /metrics).
+# Hanya memakai stdlib agar bisa di-import dari modul mana pun
+# (termasuk certificate_renderer di process pool bulk issuance).
+#
+# Nilai dihitung per proses: dengan beberapa worker uvicorn setiap
+# worker punya angka sendiri (scrape per worker / per instance).
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Batas atas bucket histogram (detik)
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value))
+
+
+# ==========================================================
+# METRIC TYPES
+# ==========================================================
+
+class Metric:
+    """
+    Dasar Counter / Gauge / Histogram. Label diberikan sebagai
+    keyword argument dan harus sama dengan labelnames.
+
+    set_function(fn) membuat nilai dibaca saat scrape (mis. ukuran
+    queue); fn return angka, atau dict {tuple nilai label: angka}.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._function = None
+        self._lock = threading.Lock()
+
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: label harus {self.labelnames}, bukan {tuple(labels)}")
+
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, fn):
+        self._function = fn
+
+    def _samples(self):
+        """Yield (suffix, nilai label, label tambahan, nilai)."""
+        if self._function is not None:
+            try:
+                result = self._function()
+            except Exception as e:
+                print(f"METRICS ERROR {self.name}:", str(e))
+                return
+
+            if not isinstance(result, dict):
+                result = {(): result}
+
+            for key, value in result.items():
+                yield "", key, (), value
+
+            return
+
+        with self._lock:
+            items = list(self._values.items())
+
+        for key, value in items:
+            yield "", key, (), value
+
+    def render(self) -> list:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}"
+        ]
+
+        for suffix, key, extra, value in self._samples():
+            labels = _format_labels(self.labelnames, key, extra)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+
+        return lines
+
+
+class Counter(Metric):
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if not METRICS_ENABLED:
+            return
+
+        key = self._key(labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+
+        key = self._key(labels)
+
+        with self._lock:
+            state = self._values.get(key)
+
+            if state is None:
+                # [count per bucket (non-kumulatif)..., sum]
+                state = self._values[key] = [0] * len(self.buckets) + [0.0]
+
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+
+        for key, state in items:
+            cumulative = 0
+
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                yield "_bucket", key, (("le", _format_value(bound)),), cumulative
+
+            yield "_sum", key, (), state[-1]
+            yield "_count", key, (), cumulative
+
+
+# ==========================================================
+# REGISTRY
+# ==========================================================
+
+class Registry:
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric sudah terdaftar: {metric.name}")
+
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+
+        for metric in metrics:
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+@contextmanager
+def timed(histogram: Histogram, errors: Counter = None, **labels):
+    """Ukur durasi blok; exception ikut dihitung di `errors` lalu di-raise ulang."""
+    start = time.perf_counter()
+
+    try:
+        yield
+    except Exception:
+        if errors is not None:
+            errors.inc(**labels)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+# ==========================================================
+# METRICS
+# ==========================================================
+# Didefinisikan di satu tempat agar nama & label konsisten; modul
+# terkait mengisi nilainya (atau memasang set_function).
+
+HTTP_REQUEST_DURATION = Histogram(
+    "sertisah_http_request_duration_seconds",
+    "Latency end-to-end request HTTP per route.",
+    ("method", "route")
+)
+HTTP_REQUESTS = Counter(
+    "sertisah_http_requests_total",
+    "Jumlah request HTTP per route dan status.",
+    ("method", "route", "status")
+)
+
+DB_QUERY_DURATION = Histogram(
+    "sertisah_db_query_duration_seconds",
+    "Durasi eksekusi query database per engine dan jenis statement.",
+    ("engine", "operation")
+)
+
+RPC_DURATION = Histogram(
+    "sertisah_rpc_duration_seconds",
+    "Durasi panggilan ledger / RPC per method.",
+    ("backend", "method")
+)
+RPC_ERRORS = Counter(
+    "sertisah_rpc_errors_total",
+    "Panggilan ledger / RPC yang gagal per method.",
+    ("backend", "method")
+)
+
+RENDER_DURATION = Histogram(
+    "sertisah_render_duration_seconds",
+    "Durasi render sertifikat per tahap (qr, pdf).",
+    ("stage",)
+)
+STORAGE_WRITE_DURATION = Histogram(
+    "sertisah_storage_write_duration_seconds",
+    "Durasi menulis object PDF ke storage."
+)
+
+AUDIT_WRITE_DURATION = Histogram(
+    "sertisah_audit_write_duration_seconds",
+    "Durasi bulk insert audit log (per flush)."
+)
+AUDIT_WRITTEN = Counter(
+    "sertisah_audit_entries_written_total",
+    "Jumlah entry audit log yang ditulis."
+)
+AUDIT_QUEUE_DEPTH = Gauge(
+    "sertisah_audit_queue_depth",
+    "Jumlah entry audit log yang menunggu ditulis."
+)
+AUDIT_ARCHIVED = Counter(
+    "sertisah_audit_entries_archived_total",
+    "Jumlah entry audit log yang dipindahkan ke arsip."
+)
+
+VERIFY_CACHE_REQUESTS = Counter(
+    "sertisah_verify_cache_requests_total",
+    "Lookup cache verifikasi chain per hasil (hit, miss).",
+    ("result",)
+)
+VERIFY_CACHE_HIT_RATIO = Gauge(
+    "sertisah_verify_cache_hit_ratio",
+    "Rasio hit cache verifikasi chain sejak proses start."
+)
+
+VERIFY_COALESCED = Counter(
+    "sertisah_verify_coalesced_total",
+    "Request /verify yang memakai hasil request identik yang sedang berjalan."
+)
+VERIFY_REJECTED = Counter(
+    "sertisah_verify_rejected_total",
+    "Request verifikasi yang ditolak sebelum I/O per alasan (rate_limited, invalid_hash).",
+    ("reason",)
+)
+
+ANCHOR_QUEUE_DEPTH = Gauge(
+    "sertisah_anchor_queue_depth",
+    "Jumlah item anchoring yang belum final per status.",
+    ("status",)
+)
+
+
+# ==========================================================
+# ASGI MIDDLEWARE
+# ==========================================================
+
+class MetricsMiddleware:
+    """
+    Catat latency & status setiap request HTTP. Label route memakai
+    template path (mis. /download-certificate/{certificate_id}), bukan
+    path mentah, agar jumlah series tetap kecil.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=method, route=path)
+            HTTP_REQUESTS.inc(method=method, route=path, status=status["code"])
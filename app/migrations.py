@@ -0,0 +1,104 @@
+from app.database import SessionLocal
+from app.models import Base, Certificate
+from app.audit_retention import ensure_audit_indexes
+from app.search import init_search_index
+from app.stats import ensure_stats
+from app.snapshot import ensure_snapshot_log
+
+
+# ==========================================================
+# SCHEMA MIGRATION (SQLite)
+# ==========================================================
+# create_all hanya membuat tabel yang belum ada; kolom baru pada tabel
+# lama (database sertisah.db sebelum fitur terkait) ditambahkan di sini
+# dengan ALTER TABLE. Idempotent: aman dijalankan setiap startup; cek
+# kolom + ALTER + backfill dalam satu BEGIN IMMEDIATE sehingga beberapa
+# worker yang start bersamaan tidak saling tumpang tindih.
+
+
+def _column_names(conn, table: str) -> set:
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def _backfill_anchor_status(conn):
+    # Sertifikat lama di-anchor sinkron: ada blockchain_tx = sudah tersimpan
+    conn.exec_driver_sql(
+        "UPDATE certificates SET anchor_status = 'CONFIRMED' "
+        "WHERE anchor_status IS NULL AND blockchain_tx IS NOT NULL"
+    )
+
+    # Tanpa blockchain_tx = anchoring lama gagal: masukkan ke outbox
+    conn.exec_driver_sql(
+        "INSERT OR IGNORE INTO anchor_queue (certificate_hash, status, attempts, created_at, updated_at) "
+        "SELECT certificate_hash, 'PENDING', 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP "
+        "FROM certificates WHERE anchor_status IS NULL AND certificate_hash IS NOT NULL"
+    )
+    conn.exec_driver_sql(
+        "UPDATE certificates SET anchor_status = 'PENDING' WHERE anchor_status IS NULL"
+    )
+
+
+# (kolom, fungsi backfill atau None), urut sesuai fitur yang menambahkannya
+CERTIFICATE_COLUMNS = [
+    ("anchor_status", _backfill_anchor_status),
+    # NULL = sertifikat di-anchor sendiri (mode single)
+    ("merkle_root", None),
+    ("merkle_proof", None),
+    # NULL = PDF lama di CERT_DIR (python -m app.storage migrate)
+    ("pdf_sha256", None),
+]
+
+
+def migrate_certificate_columns(engine):
+    """Tambah kolom Certificate yang belum ada di tabel certificates lama."""
+    table = Certificate.__table__
+
+    with engine.connect() as conn:
+        if {name for name, _ in CERTIFICATE_COLUMNS} <= _column_names(conn, table.name):
+            return
+
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+        try:
+            existing = _column_names(conn, table.name)
+
+            for name, backfill in CERTIFICATE_COLUMNS:
+                if name in existing:
+                    continue
+
+                ddl_type = table.columns[name].type.compile(dialect=engine.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {name} {ddl_type}")
+
+                if backfill:
+                    backfill(conn)
+
+                print(f"MIGRASI: kolom certificates.{name} ditambahkan")
+
+            conn.commit()
+
+        except Exception:
+            conn.rollback()
+            raise
+
+
+# ==========================================================
+# INIT DATABASE
+# ==========================================================
+# Dipakai app (startup) dan CLI yang menulis ke database
+# (python -m app.bulk_issuance, python -m app.init_admin) sehingga
+# database baru / lama selalu punya skema yang sama.
+
+def init_database(engine):
+    """Buat tabel, migrasi kolom & index, isi counter dan change log."""
+    Base.metadata.create_all(bind=engine)
+    migrate_certificate_columns(engine)
+    ensure_audit_indexes(engine)
+    init_search_index(engine)
+
+    db = SessionLocal()
+
+    try:
+        ensure_stats(db)
+        ensure_snapshot_log(db)
+    finally:
+        db.close()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Index
 from datetime import datetime
 from app.database import Base
 from sqlalchemy.ext.declarative import declarative_base
@@ -13,12 +13,16 @@ class Certificate(Base):
     id = Column(Integer, primary_key=True, index=True)
     certificate_id = Column(String, unique=True, index=True)
     name = Column(String)
-    nim = Column(String)
+    nim = Column(String, index=True)
     program_studi = Column(String)
     institusi = Column(String)
     issue_date = Column(String)
     certificate_hash = Column(String, unique=True)
     blockchain_tx = Column(String, nullable=True)
+    anchor_status = Column(String(20), default="PENDING")  # PENDING / SUBMITTED / CONFIRMED / FAILED
+    merkle_root = Column(String, nullable=True)
+    merkle_proof = Column(Text, nullable=True)  # JSON list, lihat app/merkle.py
+    pdf_sha256 = Column(String(64), nullable=True)  # object PDF, lihat app/storage.py
 
     is_revoked = Column(Boolean, default=False)
     revoked_at = Column(DateTime, nullable=True)
@@ -26,6 +30,11 @@ class Certificate(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Keyset pagination (created_at DESC, id DESC)
+    __table_args__ = (
+        Index("ix_certificates_created_at_id", "created_at", "id"),
+    )
+
 class AdminUser(Base):
     __tablename__ = "admin_users"
 
@@ -43,4 +52,101 @@ class AuditLog(Base):
     action = Column(String(100), nullable=False)
     description = Column(String(255))
     ip_address = Column(String(50))
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+        Index("ix_audit_logs_action_created_at", "action", "created_at"),
+    )
+
+class AnchorQueue(Base):
+    __tablename__ = "anchor_queue"
+
+    id = Column(Integer, primary_key=True, index=True)
+    certificate_hash = Column(String, unique=True, nullable=False)
+    status = Column(String(20), default="PENDING", index=True)  # PENDING / SUBMITTING / SUBMITTED / BATCHED / CONFIRMED / FAILED
+    batch_id = Column(Integer, ForeignKey("anchor_batches.id"), nullable=True, index=True)
+    tx_hash = Column(String, nullable=True)
+    nonce = Column(Integer, nullable=True)
+    attempts = Column(Integer, default=0)
+    last_error = Column(String(255), nullable=True)
+    submitted_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class AnchorBatch(Base):
+    __tablename__ = "anchor_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    merkle_root = Column(String, unique=True, nullable=False)
+    leaf_count = Column(Integer, nullable=False)
+    status = Column(String(20), default="PENDING", index=True)  # PENDING / SUBMITTING / SUBMITTED / CONFIRMED / FAILED
+    tx_hash = Column(String, nullable=True)
+    nonce = Column(Integer, nullable=True)
+    attempts = Column(Integer, default=0)
+    last_error = Column(String(255), nullable=True)
+    submitted_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class NonceState(Base):
+    __tablename__ = "nonce_state"
+
+    wallet_address = Column(String, primary_key=True)
+    next_nonce = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CertificateStats(Base):
+    __tablename__ = "certificate_stats"
+
+    # scope: "all" / "institusi" / "program_studi"
+    scope = Column(String(20), primary_key=True)
+    key = Column(String, primary_key=True)
+    total = Column(Integer, default=0, nullable=False)
+    anchored = Column(Integer, default=0, nullable=False)
+    revoked = Column(Integer, default=0, nullable=False)
+
+
+class ChainAnchor(Base):
+    """Hash yang tercatat di event CertificateStored, diisi oleh app/chain_indexer.py."""
+    __tablename__ = "chain_anchors"
+
+    id = Column(Integer, primary_key=True, index=True)
+    value = Column(String, unique=True, nullable=False)  # hash sertifikat / Merkle root
+    block_number = Column(Integer, nullable=False, index=True)
+    tx_hash = Column(String, nullable=True)
+    log_index = Column(Integer, nullable=True)
+    indexed_at = Column(DateTime, default=datetime.utcnow)
+
+
+class IndexerCursor(Base):
+    __tablename__ = "indexer_cursors"
+
+    name = Column(String, primary_key=True)
+    block_number = Column(Integer, nullable=False)  # blok terakhir yang sudah di-index
+    block_hash = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SnapshotChange(Base):
+    """Change log snapshot offline; id = versi snapshot (lihat app/snapshot.py)."""
+    __tablename__ = "snapshot_changes"
+
+    id = Column(Integer, primary_key=True)
+    certificate_hash = Column(String(64), nullable=False)
+    op = Column(String(10), nullable=False)  # add / revoke / remove
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class AuditRollup(Base):
+    """Agregat harian audit log yang sudah diarsipkan (lihat app/audit_retention.py)."""
+    __tablename__ = "audit_rollups"
+
+    action = Column(String(100), primary_key=True)
+    day = Column(String(10), primary_key=True)    # YYYY-MM-DD (UTC)
+    scope = Column(String(10), primary_key=True)  # all / hash / ip
+    key = Column(String, primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
@@ -0,0 +1,156 @@
+import threading
+from datetime import datetime
+
+from sqlalchemy import create_engine, event, select, insert, update
+
+from app.database import DATABASE_URL, SQLITE_BUSY_TIMEOUT, apply_sqlite_pragmas, read_engine
+from app.models import NonceState
+
+
+# ==========================================================
+# NONCE ENGINE
+# ==========================================================
+#
+# Engine terpisah yang membuka setiap transaksi dengan
+# BEGIN IMMEDIATE: SQLite langsung mengambil write lock, sehingga
+# baca-lalu-tulis next_nonce bersifat atomik antar thread DAN antar
+# proses (beberapa worker uvicorn berbagi file database yang sama).
+
+_nonce_engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT / 1000}
+)
+
+
+@event.listens_for(_nonce_engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    # Biarkan event "begin" di bawah yang mengatur BEGIN
+    dbapi_connection.isolation_level = None
+    apply_sqlite_pragmas(dbapi_connection)
+
+
+@event.listens_for(_nonce_engine, "begin")
+def _begin_immediate(conn):
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+# Lock dalam proses agar thread tidak saling menunggu busy_timeout SQLite
+_thread_lock = threading.Lock()
+
+
+# ==========================================================
+# ALLOCATE
+# ==========================================================
+# fetch_chain_nonce() adalah panggilan RPC (bisa sampai RPC_TIMEOUT):
+# selalu dipanggil SEBELUM BEGIN IMMEDIATE agar write lock database
+# tidak ditahan selama I/O jaringan.
+
+def _stored_nonce(conn, wallet_address: str):
+    return conn.execute(
+        select(NonceState.next_nonce).where(
+            NonceState.wallet_address == wallet_address
+        )
+    ).scalar()
+
+
+def _save_nonce(conn, wallet_address: str, next_nonce: int, exists: bool):
+    if exists:
+        conn.execute(
+            update(NonceState)
+            .where(NonceState.wallet_address == wallet_address)
+            .values(next_nonce=next_nonce, updated_at=datetime.utcnow())
+        )
+    else:
+        conn.execute(
+            insert(NonceState).values(
+                wallet_address=wallet_address,
+                next_nonce=next_nonce,
+                updated_at=datetime.utcnow()
+            )
+        )
+
+
+def allocate_nonce(wallet_address: str, fetch_chain_nonce) -> int:
+    """
+    Ambil nonce berikutnya untuk wallet dan naikkan counter.
+
+    `fetch_chain_nonce` dipanggil hanya jika wallet belum punya
+    state (mis. pertama kali dijalankan) untuk inisialisasi dari
+    jumlah transaksi pending di chain.
+    """
+    with _thread_lock:
+        # Cek tanpa write lock (read engine biasa)
+        with read_engine.connect() as conn:
+            known = _stored_nonce(conn, wallet_address) is not None
+
+        chain_nonce = None if known else fetch_chain_nonce()
+
+        with _nonce_engine.begin() as conn:
+            current = _stored_nonce(conn, wallet_address)
+
+            # Proses lain bisa saja sudah membuat state sejak dibaca
+            nonce = max(v for v in (current, chain_nonce) if v is not None)
+
+            _save_nonce(conn, wallet_address, nonce + 1, current is not None)
+
+    return nonce
+
+
+# ==========================================================
+# RESYNC
+# ==========================================================
+
+def resync_nonce(wallet_address: str, fetch_chain_nonce, released_nonce: int = None) -> int:
+    """
+    Samakan counter dengan nonce pending di chain.
+
+    Dipanggil saat transaksi gagal dikirim atau saat node menolak
+    nonce (terlalu rendah / sudah dipakai / diganti transaksi lain).
+    Counter hanya dinaikkan (max(tersimpan, chain)): nonce yang sudah
+    dialokasikan proses lain tetapi belum di-broadcast tidak boleh
+    dibagikan ulang.
+
+    `released_nonce` = nonce yang gagal dikirim. Counter dimundurkan ke
+    nonce itu hanya jika belum ada alokasi sesudahnya (counter masih
+    released_nonce + 1), sehingga gap terisi tanpa risiko dobel.
+    """
+    chain_nonce = fetch_chain_nonce()
+
+    with _thread_lock:
+        with _nonce_engine.begin() as conn:
+            current = _stored_nonce(conn, wallet_address)
+
+            if (
+                released_nonce is not None
+                and current == released_nonce + 1
+                and chain_nonce <= released_nonce
+            ):
+                nonce = released_nonce
+            else:
+                nonce = max(v for v in (current, chain_nonce) if v is not None)
+
+            _save_nonce(conn, wallet_address, nonce, current is not None)
+
+    print(f"NONCE RESYNC {wallet_address}: {nonce}")
+
+    return nonce
+
+
+def release_nonce(wallet_address: str, nonce: int) -> bool:
+    """
+    Kembalikan nonce yang gagal dikirim tanpa RPC (dipakai jika resync
+    ikut gagal karena RPC mati). Hanya jika belum ada alokasi sesudahnya;
+    jika sudah, gap diisi oleh anchor worker (lihat app/anchoring.py).
+    """
+    with _thread_lock:
+        with _nonce_engine.begin() as conn:
+            released = conn.execute(
+                update(NonceState)
+                .where(
+                    NonceState.wallet_address == wallet_address,
+                    NonceState.next_nonce == nonce + 1
+                )
+                .values(next_nonce=nonce, updated_at=datetime.utcnow())
+            ).rowcount
+
+    return released == 1
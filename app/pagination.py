@@ -0,0 +1,107 @@
+import os
+import base64
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from app.cache import TTLCache
+
+
+# ==========================================================
+# CONFIGURATION
+# ==========================================================
+
+# Total data di halaman list cukup perkiraan: hasil count() di-cache
+COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL", "30"))
+
+count_cache = TTLCache(max_size=1000)
+
+
+# ==========================================================
+# CURSOR
+# ==========================================================
+# Cursor = base64url("<created_at iso>|<id>") dari baris terakhir
+# (atau pertama) halaman. Urutan selalu created_at DESC, id DESC.
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Return (created_at, id) atau None jika cursor tidak valid."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+# ==========================================================
+# KEYSET PAGE
+# ==========================================================
+
+def keyset_page(query, model, per_page: int, cursor: str = "", direction: str = "next"):
+    """
+    Ambil satu halaman dengan keyset (created_at, id) tanpa OFFSET.
+
+    direction="next" -> data lebih lama dari cursor
+    direction="prev" -> data lebih baru dari cursor
+
+    Return (items, next_cursor, prev_cursor); cursor None jika tidak
+    ada halaman ke arah tersebut.
+    """
+    key = tuple_(model.created_at, model.id)
+    position = decode_cursor(cursor) if cursor else None
+    backwards = position is not None and direction == "prev"
+    base_query = query
+
+    if position is None:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    elif backwards:
+        query = query.filter(key > tuple_(*position)).order_by(
+            model.created_at.asc(), model.id.asc()
+        )
+    else:
+        query = query.filter(key < tuple_(*position)).order_by(
+            model.created_at.desc(), model.id.desc()
+        )
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+
+    if backwards:
+        if not has_more:
+            # Sudah sampai data terbaru: tampilkan halaman pertama penuh
+            return keyset_page(base_query, model, per_page)
+
+        items.reverse()
+
+    if not items:
+        return items, None, None
+
+    first = encode_cursor(items[0].created_at, items[0].id)
+    last = encode_cursor(items[-1].created_at, items[-1].id)
+
+    if backwards:
+        return items, last, first
+
+    return items, last if has_more else None, first if position else None
+
+
+# ==========================================================
+# CACHED COUNT
+# ==========================================================
+
+def cached_count(key: str, query) -> int:
+    found, total = count_cache.get(key)
+
+    if found:
+        return total
+
+    total = query.order_by(None).count()
+    count_cache.set(key, total, COUNT_CACHE_TTL)
+
+    return total
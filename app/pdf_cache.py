@@ -0,0 +1,229 @@
+import os
+import glob
+import hashlib
+import threading
+from collections import OrderedDict
+
+from app.certificate_renderer import PROJECT_ROOT, get_template, render_certificate_bytes
+
+
+# ==========================================================
+# CONFIGURATION
+# ==========================================================
+# PDF_STORAGE_MODE:
+#   disk      -> PDF ditulis ke certificates/ saat diterbitkan (default)
+#   on_demand -> tidak ada file saat diterbitkan; PDF dirender dari
+#                baris Certificate saat diunduh lalu di-cache
+
+PDF_STORAGE_MODE = os.getenv("PDF_STORAGE_MODE", "disk")
+
+PDF_CACHE_MEMORY_BYTES = int(os.getenv("PDF_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+PDF_CACHE_DISK_BYTES = int(os.getenv("PDF_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(PROJECT_ROOT, "pdf_cache"))
+
+
+def render_on_demand() -> bool:
+    return PDF_STORAGE_MODE == "on_demand"
+
+
+# ==========================================================
+# RENDERED PDF CACHE (memory + disk LRU)
+# ==========================================================
+#
+# Render bersifat deterministik (reportlab invariant), sehingga
+# bytes -- dan ETag -- sama untuk setiap render. Key cache memuat
+# fingerprint template: jika template / logo berubah, entry lama
+# tidak terpakai lagi dan keluar lewat LRU.
+
+class RenderedPDFCache:
+
+    def __init__(self, memory_bytes: int, disk_bytes: int, directory: str):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._disk_size = None
+        self._lock = threading.Lock()
+
+    # -------------------------------
+    # MEMORY
+    # -------------------------------
+
+    def _memory_get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+
+            if entry is not None:
+                self._memory.move_to_end(key)
+
+            return entry
+
+    def _memory_set(self, key, entry):
+        size = len(entry[1])
+
+        if size > self.memory_bytes:
+            return
+
+        with self._lock:
+            old = self._memory.pop(key, None)
+
+            if old is not None:
+                self._memory_size -= len(old[1])
+
+            self._memory[key] = entry
+            self._memory_size += size
+
+            while self._memory_size > self.memory_bytes:
+                _, (_, data) = self._memory.popitem(last=False)
+                self._memory_size -= len(data)
+
+    # -------------------------------
+    # DISK
+    # -------------------------------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def _disk_get(self, key):
+        path = self._path(key)
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        # Tandai baru dipakai (urutan LRU disk memakai mtime)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return data
+
+    def _disk_set(self, key: str, data: bytes):
+        if not self.disk_bytes or len(data) > self.disk_bytes:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = self._scan_disk_size()
+            else:
+                self._disk_size += len(data)
+
+            over = self._disk_size > self.disk_bytes
+
+        if over:
+            self._evict_disk()
+
+    def _scan_disk_size(self) -> int:
+        return sum(
+            os.path.getsize(p) for p in glob.glob(os.path.join(self.directory, "*.pdf"))
+        )
+
+    def _evict_disk(self):
+        """Hapus file paling lama dipakai sampai total di bawah batas."""
+        files = []
+
+        for path in glob.glob(os.path.join(self.directory, "*.pdf")):
+            try:
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                continue
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+
+        for _, size, path in files:
+            if total <= self.disk_bytes:
+                break
+
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+
+        with self._lock:
+            self._disk_size = total
+
+    # -------------------------------
+    # PUBLIC
+    # -------------------------------
+
+    def get_or_render(self, fields: dict):
+        """Return (etag, pdf_bytes) dari cache, atau render lalu simpan."""
+        # Isi QR ikut key: berubah jika QR_FORMAT / kunci penerbit diganti
+        qr_digest = hashlib.sha256(
+            (fields.get("qr_data") or fields["certificate_hash"]).encode()
+        ).hexdigest()[:8]
+        key = f"{fields['certificate_id']}-{get_template().fingerprint[:16]}-{qr_digest}"
+
+        entry = self._memory_get(key)
+
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        data = self._disk_get(key)
+
+        if data is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            data = render_certificate_bytes(fields)
+            self._disk_set(key, data)
+
+        entry = (hashlib.sha256(data).hexdigest(), data)
+        self._memory_set(key, entry)
+
+        return entry
+
+    def invalidate(self, certificate_id: str):
+        prefix = f"{certificate_id}-"
+
+        with self._lock:
+            for key in [k for k in self._memory if k.startswith(prefix)]:
+                self._memory_size -= len(self._memory.pop(key)[1])
+
+        for path in glob.glob(os.path.join(self.directory, glob.escape(prefix) + "*.pdf")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "disk_bytes": self._disk_size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.disk_hits) / total if total else 0.0
+            }
+
+
+pdf_cache = RenderedPDFCache(
+    memory_bytes=PDF_CACHE_MEMORY_BYTES,
+    disk_bytes=PDF_CACHE_DISK_BYTES,
+    directory=PDF_CACHE_DIR
+)
@@ -0,0 +1,81 @@
+import os
+import json
+
+from app.signing import sign, verify_with_key_id, get_private_key, key_id, b64encode, b64decode
+
+
+# ===============================
+# CONFIGURATION
+# ===============================
+# QR_FORMAT:
+#   hash   -> QR berisi hash sertifikat saja (default, perlu /verify)
+#   signed -> QR berisi field sertifikat + hash yang ditandatangani
+#             kunci Ed25519 penerbit; bisa diverifikasi tanpa database
+#             (POST /verify/signed atau offline dengan /issuer-key)
+#
+# Format signed: "SS1.<base64url payload>.<base64url signature>"
+# payload = JSON ringkas {"h","i","n","m","p","u","d","k"}; signature
+# Ed25519 atas bytes payload persis seperti yang di-encode.
+
+QR_FORMAT = os.getenv("QR_FORMAT", "hash").lower()
+
+PREFIX = "SS1"
+
+FIELD_KEYS = (
+    ("h", "certificate_hash"),
+    ("i", "certificate_id"),
+    ("n", "name"),
+    ("m", "nim"),
+    ("p", "program_studi"),
+    ("u", "institusi"),
+    ("d", "issue_date"),
+)
+
+
+def encode_signed_payload(fields: dict) -> str:
+    payload = {short: fields[name] for short, name in FIELD_KEYS}
+    payload["k"] = key_id()
+
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+    return f"{PREFIX}.{b64encode(raw)}.{b64encode(sign(raw))}"
+
+
+def decode_signed_payload(text: str):
+    """
+    Return (signature_valid, fields, key_id payload). Raise ValueError
+    jika teks bukan payload signed yang bisa dibaca.
+    """
+    parts = text.strip().split(".")
+
+    if len(parts) != 3 or parts[0] != PREFIX:
+        raise ValueError("Format payload tidak dikenal")
+
+    try:
+        raw = b64decode(parts[1])
+        signature = b64decode(parts[2])
+        payload = json.loads(raw)
+        fields = {name: str(payload[short]) for short, name in FIELD_KEYS}
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Payload rusak")
+
+    # Kunci lama (ISSUER_RETIRED_PUBLIC_KEYS) tetap diterima: QR yang
+    # sudah tercetak tidak batal karena rotasi kunci
+    payload_key_id = payload.get("k")
+    valid = isinstance(payload_key_id, str) and verify_with_key_id(raw, signature, payload_key_id)
+
+    return valid, fields, payload_key_id
+
+
+def check_signing_config():
+    """Dipanggil saat startup: QR_FORMAT=signed wajib punya kunci penerbit."""
+    if QR_FORMAT == "signed":
+        get_private_key()
+
+
+def qr_content(fields: dict) -> str:
+    """Isi QR sertifikat sesuai QR_FORMAT."""
+    if QR_FORMAT == "signed":
+        return encode_signed_payload(fields)
+
+    return fields["certificate_hash"]
@@ -0,0 +1,83 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+
+# ==========================================================
+# CONFIGURATION
+# ==========================================================
+# Token bucket per client (IP) untuk endpoint verifikasi publik.
+# VERIFY_RATE_LIMIT = token per detik (0 = nonaktif),
+# VERIFY_RATE_BURST = kapasitas bucket (lonjakan singkat).
+
+VERIFY_RATE_LIMIT = float(os.getenv("VERIFY_RATE_LIMIT", "20"))
+VERIFY_RATE_BURST = float(os.getenv("VERIFY_RATE_BURST", "40"))
+
+# Batas jumlah bucket di memori (LRU); client yang tergeser mulai
+# lagi dengan bucket penuh
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+
+
+# ==========================================================
+# TOKEN BUCKET
+# ==========================================================
+
+class TokenBucketLimiter:
+    """Thread-safe; bucket diisi ulang secara lazy saat diakses."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_clients = max_clients
+        self.rejected = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, key: str, cost: float = 1) -> float:
+        """
+        Return 0 jika diizinkan, selain itu detik sampai token cukup (Retry-After).
+
+        cost > burst diizinkan saat bucket penuh; saldo menjadi negatif
+        (utang) sehingga biaya tetap ditagih penuh.
+        """
+        if not self.enabled:
+            return 0.0
+
+        now = time.monotonic()
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+
+            if bucket is None:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+
+            needed = min(cost, self.burst)
+
+            if tokens >= needed:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (needed - tokens) / self.rate
+                self.rejected += 1
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+
+        return wait
+
+
+verify_limiter = TokenBucketLimiter(
+    VERIFY_RATE_LIMIT,
+    VERIFY_RATE_BURST,
+    RATE_LIMIT_MAX_CLIENTS
+)
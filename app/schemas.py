@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 class VerifyRequest(BaseModel):
     certificate_hash: str
@@ -19,3 +19,37 @@ class VerifyResponse(BaseModel):
     message: str
     data: Optional[Dict[str, Any]] = None
     blockchain_registered: bool = False
+    # blockchain : status dicek ke smart contract (atau cache-nya)
+    # database   : chain tidak tersedia, status dari anchor_status di DB
+    verification_mode: str = "blockchain"
+
+
+class VerifyBatchRequest(BaseModel):
+    certificate_hashes: List[str]
+
+
+class VerifyBatchResponse(BaseModel):
+    results: Dict[str, VerifyResponse]
+
+
+class VerifySignedRequest(BaseModel):
+    payload: str
+
+
+class VerifySignedResponse(BaseModel):
+    valid: bool
+    message: str
+    data: Optional[Dict[str, Any]] = None
+    signature_valid: bool = False
+    key_id: Optional[str] = None
+    # Hanya tanda tangan penerbit yang dicek (tanpa database / chain);
+    # status revoke lihat /snapshot/revocations
+    verification_mode: str = "signature"
+
+
+class VerifySignedBatchRequest(BaseModel):
+    payloads: List[str]
+
+
+class VerifySignedBatchResponse(BaseModel):
+    results: List[VerifySignedResponse]
@@ -0,0 +1,122 @@
+from sqlalchemy import or_, text, column
+
+from app.models import Certificate
+
+
+# ==========================================================
+# FULL-TEXT SEARCH INDEX (SQLite FTS5, trigram)
+# ==========================================================
+#
+# Index external-content atas tabel certificates. Tokenizer trigram
+# mendukung pencarian substring (setara ILIKE '%...%') tetapi lewat
+# index. Sinkronisasi dilakukan oleh trigger SQLite sehingga insert,
+# update kolom yang di-index dan delete selalu ikut ter-index dalam
+# transaksi yang sama. Update kolom lain (anchor_status, merkle_proof,
+# revoke, ...) tidak menyentuh index.
+
+FTS_TABLE = "certificates_fts"
+UPDATE_TRIGGER = "certificates_fts_au"
+
+# Trigram butuh minimal 3 karakter per term
+MIN_TERM_LENGTH = 3
+
+_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        nim, name, program_studi, institusi,
+        content='certificates',
+        content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS certificates_fts_ai AFTER INSERT ON certificates BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, nim, name, program_studi, institusi)
+        VALUES (new.id, new.nim, new.name, new.program_studi, new.institusi);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS certificates_fts_ad AFTER DELETE ON certificates BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nim, name, program_studi, institusi)
+        VALUES ('delete', old.id, old.nim, old.name, old.program_studi, old.institusi);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {UPDATE_TRIGGER}
+    AFTER UPDATE OF nim, name, program_studi, institusi ON certificates BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nim, name, program_studi, institusi)
+        VALUES ('delete', old.id, old.nim, old.name, old.program_studi, old.institusi);
+        INSERT INTO {FTS_TABLE}(rowid, nim, name, program_studi, institusi)
+        VALUES (new.id, new.nim, new.name, new.program_studi, new.institusi);
+    END
+    """,
+]
+
+
+def init_search_index(engine):
+    """
+    Buat tabel FTS + trigger jika belum ada. Jika index baru dibuat
+    pada database yang sudah berisi data, index di-rebuild sekali.
+    """
+    with engine.begin() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (FTS_TABLE,)
+        ).first()
+
+        # Database lama: trigger update masih untuk semua kolom
+        trigger_sql = conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+            (UPDATE_TRIGGER,)
+        ).scalar()
+
+        if trigger_sql and "UPDATE OF" not in trigger_sql.upper():
+            conn.exec_driver_sql(f"DROP TRIGGER {UPDATE_TRIGGER}")
+
+        for ddl in _FTS_DDL:
+            conn.exec_driver_sql(ddl)
+
+        if not exists:
+            conn.exec_driver_sql(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+# ==========================================================
+# SEARCH
+# ==========================================================
+
+def apply_search(query, q: str):
+    """
+    Filter query Certificate dengan kata kunci bebas atas
+    nim, name, program_studi dan institusi (semua term harus cocok).
+    """
+    terms = q.split()
+
+    fts_terms = [t for t in terms if len(t) >= MIN_TERM_LENGTH]
+    short_terms = [t for t in terms if len(t) < MIN_TERM_LENGTH]
+
+    if fts_terms:
+        matches = text(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+        ).bindparams(
+            match=" ".join(_quote(t) for t in fts_terms)
+        ).columns(column("rowid"))
+
+        query = query.filter(Certificate.id.in_(matches))
+
+    # Term pendek tidak bisa memakai index trigram
+    for term in short_terms:
+        like = f"%{term}%"
+        query = query.filter(or_(
+            Certificate.nim.ilike(like),
+            Certificate.name.ilike(like),
+            Certificate.program_studi.ilike(like),
+            Certificate.institusi.ilike(like)
+        ))
+
+    return query
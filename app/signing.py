@@ -0,0 +1,223 @@
+import os
+import base64
+import hashlib
+import threading
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+    Ed25519PrivateKey,
+    Ed25519PublicKey
+)
+
+from app.certificate_renderer import PROJECT_ROOT
+
+
+# ===============================
+# CONFIGURATION
+# ===============================
+# Kunci Ed25519 penerbit untuk menandatangani snapshot offline dan
+# payload QR. Public key dibagikan lewat GET /issuer-key.
+#
+# ISSUER_SIGNING_KEY      : seed 32 byte (base64), diutamakan
+# ISSUER_SIGNING_KEY_FILE : file PEM PKCS#8
+# ISSUER_SIGNING_KEY_AUTOGENERATE=true : buat file kunci jika belum ada
+#                           (HANYA development: setiap node akan punya
+#                           kunci sendiri, QR node lain tidak valid)
+#
+# Semua instance harus memakai kunci yang sama. Saat rotasi, public key
+# lama dimasukkan ke ISSUER_RETIRED_PUBLIC_KEYS (base64, pisah koma)
+# agar QR yang sudah tercetak tetap bisa diverifikasi.
+
+ISSUER_SIGNING_KEY = os.getenv("ISSUER_SIGNING_KEY")
+ISSUER_SIGNING_KEY_FILE = os.getenv(
+    "ISSUER_SIGNING_KEY_FILE",
+    os.path.join(PROJECT_ROOT, "issuer_signing.key")
+)
+ISSUER_SIGNING_KEY_AUTOGENERATE = os.getenv(
+    "ISSUER_SIGNING_KEY_AUTOGENERATE", "false"
+).lower() in ("1", "true", "yes")
+
+ISSUER_RETIRED_PUBLIC_KEYS = [
+    value.strip()
+    for value in os.getenv("ISSUER_RETIRED_PUBLIC_KEYS", "").split(",")
+    if value.strip()
+]
+
+ALGORITHM = "Ed25519"
+SIGNATURE_SIZE = 64
+
+
+# ===============================
+# ENCODING
+# ===============================
+# base64url tanpa padding: ringkas untuk QR dan URL
+
+def b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def b64decode(text: str) -> bytes:
+    text = text.strip().replace("+", "-").replace("/", "_")
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+# ===============================
+# KEY
+# ===============================
+
+class SigningKeyNotConfigured(Exception):
+    pass
+
+
+def _load_key_file(path: str) -> Ed25519PrivateKey:
+    with open(path, "rb") as f:
+        return serialization.load_pem_private_key(f.read(), password=None)
+
+
+def _create_key_file(path: str) -> Ed25519PrivateKey:
+    key = Ed25519PrivateKey.generate()
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+
+    try:
+        # O_EXCL: worker lain yang lebih dulu membuat file menang
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return _load_key_file(path)
+
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+
+    print("KUNCI PENERBIT DIBUAT:", path)
+
+    return key
+
+
+_private_key = None
+_public_key = None
+_key_id = None
+_key_lock = threading.Lock()
+
+
+def get_private_key() -> Ed25519PrivateKey:
+    global _private_key
+
+    if _private_key is None:
+        with _key_lock:
+            if _private_key is None:
+                if ISSUER_SIGNING_KEY:
+                    _private_key = Ed25519PrivateKey.from_private_bytes(
+                        b64decode(ISSUER_SIGNING_KEY)
+                    )
+                elif os.path.exists(ISSUER_SIGNING_KEY_FILE):
+                    _private_key = _load_key_file(ISSUER_SIGNING_KEY_FILE)
+                elif ISSUER_SIGNING_KEY_AUTOGENERATE:
+                    _private_key = _create_key_file(ISSUER_SIGNING_KEY_FILE)
+                else:
+                    raise SigningKeyNotConfigured(
+                        "Kunci penerbit belum dikonfigurasi (ISSUER_SIGNING_KEY "
+                        "atau ISSUER_SIGNING_KEY_FILE)"
+                    )
+
+    return _private_key
+
+
+def get_public_key() -> Ed25519PublicKey:
+    global _public_key
+
+    if _public_key is None:
+        _public_key = get_private_key().public_key()
+
+    return _public_key
+
+
+def public_key_bytes() -> bytes:
+    return get_public_key().public_bytes(
+        serialization.Encoding.Raw,
+        serialization.PublicFormat.Raw
+    )
+
+
+def _key_id_for(public_bytes: bytes) -> str:
+    return hashlib.sha256(public_bytes).hexdigest()[:16]
+
+
+def key_id() -> str:
+    """ID pendek public key (8 byte pertama sha256, hex)."""
+    global _key_id
+
+    if _key_id is None:
+        _key_id = _key_id_for(public_key_bytes())
+
+    return _key_id
+
+
+_retired_keys = None
+
+
+def retired_public_keys() -> dict:
+    """{key_id: public key bytes} dari ISSUER_RETIRED_PUBLIC_KEYS."""
+    global _retired_keys
+
+    if _retired_keys is None:
+        keys = {}
+
+        for value in ISSUER_RETIRED_PUBLIC_KEYS:
+            raw = b64decode(value)
+
+            # Validasi saat load: kunci rusak langsung ketahuan
+            Ed25519PublicKey.from_public_bytes(raw)
+            keys[_key_id_for(raw)] = raw
+
+        _retired_keys = keys
+
+    return _retired_keys
+
+
+def public_key_info() -> dict:
+    return {
+        "algorithm": ALGORITHM,
+        "key_id": key_id(),
+        "public_key": b64encode(public_key_bytes()),
+        "retired_keys": [
+            {"key_id": retired_id, "public_key": b64encode(raw)}
+            for retired_id, raw in retired_public_keys().items()
+        ]
+    }
+
+
+# ===============================
+# SIGN / VERIFY
+# ===============================
+
+def sign(data: bytes) -> bytes:
+    return get_private_key().sign(data)
+
+
+def verify_with_key_id(data: bytes, signature: bytes, signer_key_id: str) -> bool:
+    """Cek tanda tangan dengan kunci aktif atau kunci lama (retired) sesuai key id."""
+    if signer_key_id == key_id():
+        return verify_signature(data, signature)
+
+    public_key = retired_public_keys().get(signer_key_id)
+
+    return public_key is not None and verify_signature(data, signature, public_key)
+
+
+def verify_signature(data: bytes, signature: bytes, public_key: bytes = None) -> bool:
+    """Cek tanda tangan (default: kunci penerbit aktif)."""
+    try:
+        key = (
+            Ed25519PublicKey.from_public_bytes(public_key)
+            if public_key is not None
+            else get_public_key()
+        )
+        key.verify(signature, data)
+    except (InvalidSignature, ValueError):
+        return False
+
+    return True
@@ -0,0 +1,45 @@
+import asyncio
+
+
+# ==========================================================
+# SINGLE-FLIGHT (REQUEST COALESCING)
+# ==========================================================
+
+class SingleFlight:
+    """
+    Request konkuren dengan key yang sama berbagi SATU eksekusi
+    coroutine; yang datang belakangan menunggu hasil yang sama.
+    Hasil tidak disimpan setelah selesai (itu tugas cache).
+
+    Eksekusi berjalan sebagai task tersendiri: jika request pertama
+    dibatalkan (client putus), request lain tetap mendapat hasil.
+    Dipakai dari satu event loop (per worker).
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._tasks = {}
+
+    async def do(self, key, factory):
+        """factory() -> coroutine; dipanggil hanya jika belum ada yang in-flight."""
+        task = self._tasks.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+        # Tandai exception sudah diambil walau semua penunggu batal
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
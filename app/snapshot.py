@@ -0,0 +1,209 @@
+import os
+import json
+import struct
+import threading
+
+from sqlalchemy import func, insert, select, literal
+from sqlalchemy.orm import Session
+
+from app.models import Certificate, SnapshotChange
+from app.signing import sign, key_id, b64encode, ALGORITHM
+
+
+# ==========================================================
+# OFFLINE VERIFICATION SNAPSHOT
+# ==========================================================
+#
+# Aplikasi Android mengunduh dua set hash bertanda tangan:
+#   - certificates : hash sertifikat yang sudah ter-anchor (CONFIRMED)
+#   - revocations  : hash sertifikat yang dicabut
+# lalu memverifikasi QR di perangkat (binary search) dan hanya
+# memanggil /verify untuk hash yang belum ada di snapshot.
+#
+# Versi snapshot = id terakhir di tabel snapshot_changes. Setiap
+# perubahan set (anchor, revoke, delete) dicatat di transaksi yang
+# sama dengan perubahan Certificate, sehingga aplikasi bisa sync
+# inkremental lewat /snapshot/delta?since=<versi>.
+#
+# Format biner (big-endian):
+#   "SSNP" | u8 format | u8 kind | u64 version | u32 count
+#   | count x 32 byte hash (urut naik) | 64 byte signature Ed25519
+# Signature mencakup semua byte sebelumnya.
+
+SNAPSHOT_DELTA_MAX = int(os.getenv("SNAPSHOT_DELTA_MAX", "50000"))
+
+MAGIC = b"SSNP"
+FORMAT_VERSION = 1
+
+KIND_CERTIFICATES = 1
+KIND_REVOCATIONS = 2
+
+HEADER = struct.Struct(">4sBBQI")
+
+# Urutan penerapan delta: remove bersifat final (hash tidak pernah
+# dipakai ulang), revoke selalu setelah add untuk hash yang sama.
+DELTA_OPS = ("add", "revoke", "remove")
+
+
+# ==========================================================
+# CHANGE LOG
+# ==========================================================
+# Fungsi record_* TIDAK melakukan commit (sama seperti app/stats.py).
+
+def record_snapshot_change(db: Session, op: str, hashes: list):
+    if hashes:
+        db.execute(
+            insert(SnapshotChange),
+            [{"certificate_hash": value, "op": op} for value in hashes]
+        )
+
+
+def ensure_snapshot_log(db: Session):
+    """
+    Dipanggil saat startup: isi change log dari tabel certificates
+    jika masih kosong (database yang sudah ada sebelum fitur ini).
+    """
+    if db.query(SnapshotChange.id).first():
+        return
+
+    columns = [SnapshotChange.certificate_hash, SnapshotChange.op]
+
+    db.execute(insert(SnapshotChange).from_select(
+        columns,
+        select(Certificate.certificate_hash, literal("add"))
+        .where(Certificate.anchor_status == "CONFIRMED")
+        .order_by(Certificate.id)
+    ))
+    db.execute(insert(SnapshotChange).from_select(
+        columns,
+        select(Certificate.certificate_hash, literal("revoke"))
+        .where(Certificate.is_revoked.is_(True))
+        .order_by(Certificate.id)
+    ))
+    db.commit()
+
+
+def current_version(db: Session) -> int:
+    return db.query(func.max(SnapshotChange.id)).scalar() or 0
+
+
+# ==========================================================
+# FULL SNAPSHOT
+# ==========================================================
+
+def _snapshot_filter(kind: int):
+    if kind == KIND_CERTIFICATES:
+        return Certificate.anchor_status == "CONFIRMED"
+
+    return Certificate.is_revoked.is_(True)
+
+
+def build_snapshot(db: Session, kind: int):
+    """Return (version, bytes snapshot bertanda tangan)."""
+    # Versi dibaca sebelum hash: perubahan yang terjadi di antaranya
+    # ikut terkirim lagi di delta berikutnya (penerapan delta idempotent)
+    version = current_version(db)
+
+    hashes = db.execute(
+        select(Certificate.certificate_hash)
+        .where(_snapshot_filter(kind))
+        .order_by(Certificate.certificate_hash)
+    ).scalars()
+
+    # Hex huruf kecil: urutan string == urutan byte
+    body = b"".join(bytes.fromhex(value) for value in hashes)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, kind, version, len(body) // 32)
+
+    return version, header + body + sign(header + body)
+
+
+class SnapshotCache:
+    """Satu snapshot per kind, dibangun ulang hanya jika versi berubah."""
+
+    def __init__(self):
+        self._entries = {}
+        self._locks = {
+            KIND_CERTIFICATES: threading.Lock(),
+            KIND_REVOCATIONS: threading.Lock()
+        }
+
+    def get(self, db: Session, kind: int):
+        version = current_version(db)
+        entry = self._entries.get(kind)
+
+        if entry and entry[0] >= version:
+            return entry
+
+        # Hanya satu thread yang membangun; yang lain memakai hasilnya
+        with self._locks[kind]:
+            entry = self._entries.get(kind)
+
+            if not entry or entry[0] < version:
+                entry = self._entries[kind] = build_snapshot(db, kind)
+
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+
+snapshot_cache = SnapshotCache()
+
+
+# ==========================================================
+# DELTA
+# ==========================================================
+
+def _canonical(payload: dict) -> bytes:
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+
+
+def build_delta(db: Session, since: int):
+    """
+    Perubahan setelah versi `since`. Return dict bertanda tangan, atau
+    None jika perubahan lebih dari SNAPSHOT_DELTA_MAX (aplikasi harus
+    mengunduh snapshot penuh). Raise ValueError jika since tidak valid.
+
+    Signature = Ed25519 atas JSON kanonik (sort_keys, tanpa spasi) dari
+    field selain key_id / algorithm / signature.
+    """
+    version = current_version(db)
+
+    if since < 0 or since > version:
+        raise ValueError(f"Versi tidak valid (versi terbaru {version})")
+
+    rows = (
+        db.query(SnapshotChange.op, SnapshotChange.certificate_hash)
+        .filter(SnapshotChange.id > since, SnapshotChange.id <= version)
+        .order_by(SnapshotChange.id)
+        .limit(SNAPSHOT_DELTA_MAX + 1)
+        .all()
+    )
+
+    if len(rows) > SNAPSHOT_DELTA_MAX:
+        return None
+
+    payload = {"from_version": since, "version": version}
+    payload.update({op: [] for op in DELTA_OPS})
+
+    for op, value in rows:
+        payload[op].append(value)
+
+    return {
+        **payload,
+        "algorithm": ALGORITHM,
+        "key_id": key_id(),
+        "signature": b64encode(sign(_canonical(payload)))
+    }
+
+
+def snapshot_manifest(db: Session) -> dict:
+    return {
+        "version": current_version(db),
+        "format": FORMAT_VERSION,
+        "algorithm": ALGORITHM,
+        "key_id": key_id(),
+        "certificates_url": "/snapshot/certificates",
+        "revocations_url": "/snapshot/revocations",
+        "delta_url": "/snapshot/delta?since={version}"
+    }
@@ -0,0 +1,165 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.models import Certificate, CertificateStats
+
+
+# ==========================================================
+# INCREMENTAL DASHBOARD COUNTERS
+# ==========================================================
+#
+# Tabel certificate_stats berisi total / anchored / revoked untuk
+# scope "all" serta per institusi dan per program_studi.
+# Fungsi record_* TIDAK melakukan commit: dipanggil di transaksi yang
+# sama dengan perubahan Certificate sehingga counter selalu konsisten.
+
+ALL_KEY = "*"
+
+
+def _bump(db: Session, scope: str, key: str, total=0, anchored=0, revoked=0):
+    stmt = sqlite_insert(CertificateStats).values(
+        scope=scope,
+        key=key or "",
+        total=total,
+        anchored=anchored,
+        revoked=revoked
+    )
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["scope", "key"],
+        set_={
+            "total": CertificateStats.total + stmt.excluded.total,
+            "anchored": CertificateStats.anchored + stmt.excluded.anchored,
+            "revoked": CertificateStats.revoked + stmt.excluded.revoked
+        }
+    )
+
+    db.execute(stmt)
+
+
+def _bump_certificate(db: Session, institusi: str, program_studi: str, **deltas):
+    _bump(db, "all", ALL_KEY, **deltas)
+    _bump(db, "institusi", institusi, **deltas)
+    _bump(db, "program_studi", program_studi, **deltas)
+
+
+# ==========================================================
+# EVENTS
+# ==========================================================
+
+def record_issued(db: Session, institusi: str, program_studi: str, count: int = 1):
+    _bump_certificate(db, institusi, program_studi, total=count)
+
+
+def record_anchored(db: Session, certificates: list):
+    for cert in certificates:
+        _bump_certificate(db, cert.institusi, cert.program_studi, anchored=1)
+
+
+def record_revoked(db: Session, cert: Certificate):
+    _bump_certificate(db, cert.institusi, cert.program_studi, revoked=1)
+
+
+def record_deleted(db: Session, cert: Certificate):
+    _bump_certificate(
+        db,
+        cert.institusi,
+        cert.program_studi,
+        total=-1,
+        anchored=-1 if cert.anchor_status == "CONFIRMED" else 0,
+        revoked=-1 if cert.is_revoked else 0
+    )
+
+
+# ==========================================================
+# REBUILD
+# ==========================================================
+
+def rebuild_stats(db: Session):
+    """Hitung ulang seluruh counter dari tabel certificates."""
+    db.query(CertificateStats).delete()
+
+    anchored = func.sum(func.iif(Certificate.anchor_status == "CONFIRMED", 1, 0))
+    revoked = func.sum(func.iif(Certificate.is_revoked.is_(True), 1, 0))
+
+    groups = [
+        ("all", None),
+        ("institusi", Certificate.institusi),
+        ("program_studi", Certificate.program_studi)
+    ]
+
+    for scope, column in groups:
+        if column is None:
+            rows = db.query(func.count(Certificate.id), anchored, revoked).all()
+            rows = [(ALL_KEY,) + tuple(rows[0])]
+        else:
+            rows = (
+                db.query(column, func.count(Certificate.id), anchored, revoked)
+                .group_by(column)
+                .all()
+            )
+
+        for key, total, anchored_count, revoked_count in rows:
+            db.add(CertificateStats(
+                scope=scope,
+                key=key or "",
+                total=total or 0,
+                anchored=anchored_count or 0,
+                revoked=revoked_count or 0
+            ))
+
+    db.commit()
+
+
+def ensure_stats(db: Session):
+    """
+    Dipanggil saat startup: isi counter jika tabel masih kosong.
+
+    Cek + rebuild dalam satu BEGIN IMMEDIATE: worker lain yang start
+    bersamaan menunggu lalu melihat counter yang sudah terisi, sehingga
+    tidak ada rebuild ganda yang menimpa increment record_*.
+    """
+    db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+
+    try:
+        exists = db.query(CertificateStats).filter(
+            CertificateStats.scope == "all"
+        ).first()
+
+        if exists:
+            db.commit()
+        else:
+            rebuild_stats(db)
+
+    except Exception:
+        db.rollback()
+        raise
+
+
+# ==========================================================
+# READ
+# ==========================================================
+
+def get_dashboard_stats(db: Session, breakdown_limit: int = 10) -> dict:
+    summary = db.query(CertificateStats).filter(
+        CertificateStats.scope == "all",
+        CertificateStats.key == ALL_KEY
+    ).first()
+
+    def breakdown(scope):
+        return (
+            db.query(CertificateStats)
+            .filter(CertificateStats.scope == scope, CertificateStats.total > 0)
+            .order_by(CertificateStats.total.desc())
+            .limit(breakdown_limit)
+            .all()
+        )
+
+    return {
+        "total": summary.total if summary else 0,
+        "anchored": summary.anchored if summary else 0,
+        "revoked": summary.revoked if summary else 0,
+        "per_institusi": breakdown("institusi"),
+        "per_program_studi": breakdown("program_studi")
+    }
@@ -0,0 +1,117 @@
+import os
+import sys
+import hashlib
+import threading
+
+from app.certificate_renderer import CERT_DIR, render_certificate_bytes
+from app.metrics import STORAGE_WRITE_DURATION
+
+
+# ===============================
+# CONFIGURATION
+# ===============================
+# Content-addressed: nama file = sha256 isi PDF, disebar ke
+# direktori bertingkat (ab/cd/abcd....pdf) agar tidak ada satu
+# direktori berisi jutaan file. Isi sebuah object tidak pernah
+# berubah, sehingga aman di-cache selamanya oleh browser / CDN.
+#
+# Seperti certificate_renderer, modul ini tidak memuat database
+# agar bisa dipakai di process pool bulk issuance.
+
+STORAGE_DIR = os.getenv("CERTIFICATE_STORAGE_DIR", os.path.join(CERT_DIR, "objects"))
+
+
+# ===============================
+# OBJECTS
+# ===============================
+
+def object_path(digest: str) -> str:
+    return os.path.join(STORAGE_DIR, digest[0:2], digest[2:4], f"{digest}.pdf")
+
+
+def object_exists(digest: str) -> bool:
+    return bool(digest) and os.path.exists(object_path(digest))
+
+
+def put_object(data: bytes) -> str:
+    """Simpan bytes PDF, return sha256. Object yang sudah ada tidak ditulis ulang."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = object_path(digest)
+
+    if os.path.exists(path):
+        return digest
+
+    with STORAGE_WRITE_DURATION.time():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+        os.replace(tmp_path, path)
+
+    return digest
+
+
+def remove_object(digest: str):
+    if not digest:
+        return
+
+    path = object_path(digest)
+
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def store_certificate_pdf(fields: dict) -> str:
+    """Render PDF sertifikat lalu simpan sebagai object. Return sha256."""
+    return put_object(render_certificate_bytes(fields))
+
+
+# ===============================
+# MIGRATE LEGACY FILES
+# ===============================
+# python -m app.storage migrate
+#
+# Pindahkan certificates/{certificate_id}.pdf (layout lama, datar)
+# ke object store dan isi kolom Certificate.pdf_sha256.
+
+def migrate_legacy_files() -> int:
+    from app.database import SessionLocal
+    from app.models import Certificate
+    from app.certificate_renderer import remove_certificate_files
+
+    db = SessionLocal()
+    moved = 0
+
+    try:
+        certificates = db.query(Certificate).filter(
+            Certificate.pdf_sha256.is_(None)
+        ).all()
+
+        for cert in certificates:
+            legacy_path = os.path.join(CERT_DIR, f"{cert.certificate_id}.pdf")
+
+            if not os.path.exists(legacy_path):
+                continue
+
+            with open(legacy_path, "rb") as f:
+                cert.pdf_sha256 = put_object(f.read())
+
+            db.commit()
+            remove_certificate_files(cert.certificate_id)
+            moved += 1
+
+    finally:
+        db.close()
+
+    return moved
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["migrate"]:
+        print("Usage: python -m app.storage migrate")
+        sys.exit(1)
+
+    print(f"{migrate_legacy_files()} file dipindahkan ke {STORAGE_DIR}")
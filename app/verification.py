@@ -0,0 +1,202 @@
+import re
+import json
+
+from app.models import Certificate
+from app.merkle import verify_merkle_proof
+from app.schemas import VerifyResponse, VerifySignedResponse
+from app.blockchain import (
+    verify_certificate_on_chain_async,
+    verify_many_on_chain_async
+)
+from app.chain_indexer import indexed_values_async
+from app.certificate_service import compute_certificate_hash
+from app.qr_payload import decode_signed_payload
+
+
+# ===============================
+# ANCHOR VALUE
+# ===============================
+
+def anchor_value(cert: Certificate) -> str:
+    """
+    Nilai yang tersimpan di smart contract untuk sertifikat ini:
+    Merkle root (mode batch) atau hash sertifikat itu sendiri.
+    """
+    return cert.merkle_root or cert.certificate_hash
+
+
+def load_merkle_proof(cert: Certificate) -> list:
+    if not cert.merkle_proof:
+        return []
+
+    return json.loads(cert.merkle_proof)
+
+
+def check_merkle_inclusion(cert: Certificate) -> bool:
+    """Cek proof secara lokal terhadap root, tanpa RPC."""
+    if not cert.merkle_root:
+        return True
+
+    return verify_merkle_proof(
+        cert.certificate_hash,
+        load_merkle_proof(cert),
+        cert.merkle_root
+    )
+
+
+# ===============================
+# ON-CHAIN CHECK
+# ===============================
+
+# True / False, atau None jika chain tidak tersedia (mode DB-only).
+# Jika session `db` diberikan, index event lokal (app/chain_indexer.py)
+# dicek lebih dulu; RPC hanya untuk hash yang belum ter-index.
+
+async def is_certificate_anchored_async(cert: Certificate, db=None):
+    if not check_merkle_inclusion(cert):
+        return False
+
+    value = anchor_value(cert)
+
+    if db is not None and await indexed_values_async(db, [value]):
+        return True
+
+    return await verify_certificate_on_chain_async(value)
+
+
+async def verify_certificates_on_chain_async(certs: list, db=None) -> dict:
+    """
+    Status on-chain untuk banyak sertifikat: {certificate_hash: bool / None}.
+    Sertifikat satu batch Merkle berbagi root, sehingga root yang sama
+    hanya dicek sekali.
+    """
+    included = [cert for cert in certs if check_merkle_inclusion(cert)]
+    values = [anchor_value(cert) for cert in included]
+
+    indexed = await indexed_values_async(db, values) if db is not None else set()
+
+    anchored = await verify_many_on_chain_async(
+        [value for value in values if value not in indexed]
+    )
+    anchored.update(dict.fromkeys(indexed, True))
+
+    results = {cert.certificate_hash: False for cert in certs}
+
+    for cert in included:
+        results[cert.certificate_hash] = anchored.get(anchor_value(cert))
+
+    return results
+
+
+# ===============================
+# HASH FORMAT
+# ===============================
+
+HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+def normalize_hash(value: str):
+    """Hash huruf kecil, atau None jika bukan 64 karakter hex (tolak tanpa I/O)."""
+    value = value.strip()
+
+    if len(value) != 64:
+        return None
+
+    value = value.lower()
+
+    return value if HASH_PATTERN.fullmatch(value) else None
+
+
+# ===============================
+# RESPONSE
+# ===============================
+
+def not_found_response() -> VerifyResponse:
+    return VerifyResponse(
+        valid=False,
+        message="Sertifikat tidak valid",
+        data=None,
+        blockchain_registered=False
+    )
+
+
+def invalid_hash_response() -> VerifyResponse:
+    return VerifyResponse(
+        valid=False,
+        message="Format hash tidak valid",
+        data=None,
+        blockchain_registered=False
+    )
+
+
+def build_verify_response(cert: Certificate, blockchain_status) -> VerifyResponse:
+    """
+    blockchain_status None berarti chain tidak tersedia: respons turun
+    ke mode DB-only memakai anchor_status terakhir yang tercatat.
+    """
+    verification_mode = "blockchain"
+
+    if blockchain_status is None:
+        verification_mode = "database"
+        blockchain_status = cert.anchor_status == "CONFIRMED" and check_merkle_inclusion(cert)
+
+    return VerifyResponse(
+        valid=True,
+        message="Sertifikat ditemukan",
+        data={
+            "certificate_id": cert.certificate_id,
+            "name": cert.name,
+            "nim": cert.nim,
+            "program_studi": cert.program_studi,
+            "institusi": cert.institusi,
+            "issue_date": cert.issue_date,
+            "blockchain_verified": blockchain_status,
+            "transaction_hash": cert.blockchain_tx,
+            "anchor_status": cert.anchor_status,
+            "merkle_root": cert.merkle_root,
+            "merkle_proof": load_merkle_proof(cert),
+            "explorer_url": f"https://amoy.polygonscan.com/tx/{cert.blockchain_tx}"
+            if cert.blockchain_tx else None,
+            "is_revoked": cert.is_revoked,
+            "revoked_reason": cert.revoked_reason
+        },
+        blockchain_registered=blockchain_status,
+        verification_mode=verification_mode
+    )
+
+
+# ===============================
+# SIGNED QR PAYLOAD
+# ===============================
+# Tanpa database maupun RPC: cek tanda tangan penerbit lalu cocokkan
+# hash dengan field yang dibawa payload.
+
+def verify_signed_payload(text: str) -> VerifySignedResponse:
+    try:
+        signature_valid, fields, payload_key_id = decode_signed_payload(text)
+    except ValueError as e:
+        return VerifySignedResponse(valid=False, message=str(e))
+
+    hash_valid = fields["certificate_hash"] == compute_certificate_hash(
+        fields["name"],
+        fields["nim"],
+        fields["program_studi"],
+        fields["institusi"],
+        fields["certificate_id"]
+    )
+
+    if not signature_valid or not hash_valid:
+        return VerifySignedResponse(
+            valid=False,
+            message="Tanda tangan tidak valid",
+            signature_valid=signature_valid,
+            key_id=payload_key_id
+        )
+
+    return VerifySignedResponse(
+        valid=True,
+        message="Tanda tangan penerbit valid",
+        data=fields,
+        signature_valid=True,
+        key_id=payload_key_id
+    )
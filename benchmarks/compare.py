@@ -0,0 +1,64 @@
+"""
+Bandingkan dua hasil benchmark (JSON dari benchmarks.run).
+
+    python -m benchmarks.compare base.json candidate.json
+"""
+import sys
+import json
+
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def _change(base: float, candidate: float) -> str:
+    if not base:
+        return "   n/a"
+
+    return f"{(candidate - base) / base * 100:+6.1f}%"
+
+
+def compare(base: dict, candidate: dict) -> list:
+    lines = [
+        f"base      : {base['meta']['commit']} ({base['meta']['timestamp']})",
+        f"candidate : {candidate['meta']['commit']} ({candidate['meta']['timestamp']})",
+        ""
+    ]
+
+    header = f"{'scenario':<14}{'metric':<16}{'base':>12}{'candidate':>12}{'change':>9}"
+    lines.append(header)
+    lines.append("-" * len(header))
+
+    for scenario, base_result in base["results"].items():
+        candidate_result = candidate["results"].get(scenario)
+
+        if candidate_result is None:
+            continue
+
+        for metric in METRICS:
+            lines.append(
+                f"{scenario:<14}{metric:<16}"
+                f"{base_result[metric]:>12.2f}{candidate_result[metric]:>12.2f}"
+                f"{_change(base_result[metric], candidate_result[metric]):>9}"
+            )
+
+    return lines
+
+
+def main(argv: list):
+    if len(argv) != 3:
+        print("Usage: python -m benchmarks.compare <base.json> <candidate.json>")
+        return 1
+
+    with open(argv[1]) as f:
+        base = json.load(f)
+
+    with open(argv[2]) as f:
+        candidate = json.load(f)
+
+    print("\n".join(compare(base, candidate)))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
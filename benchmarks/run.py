@@ -0,0 +1,337 @@
+"""
+Benchmark hot path issuance & verifikasi terhadap ledger simulasi
+dan database seed.
+
+    python -m benchmarks.run --certificates 10000
+    python -m benchmarks.run --certificates 1000000 --workdir /tmp/bench-1m
+    python -m benchmarks.compare old.json new.json
+
+Jalankan dari root repository (template & static dibaca relatif
+terhadap working directory).
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+
+SCENARIOS = ("verify", "verify_batch", "generate", "search", "paginate", "render_pdf")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="SertiSah benchmark")
+    parser.add_argument("--certificates", type=int, default=10000,
+                        help="jumlah sertifikat di database seed (10k - 1M)")
+    parser.add_argument("--requests", type=int, default=2000,
+                        help="jumlah request per skenario baca")
+    parser.add_argument("--generate-requests", type=int, default=200)
+    parser.add_argument("--render-iterations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--ledger-latency-ms", type=float, default=50,
+                        help="latency buatan per panggilan ledger simulasi")
+    parser.add_argument("--miss-ratio", type=float, default=0.05,
+                        help="proporsi hash tidak dikenal pada /verify")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--workdir", default=None,
+                        help="direktori database & file (dipakai ulang jika ada)")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+# ==========================================================
+# ENVIRONMENT
+# ==========================================================
+# Harus di-set sebelum modul app di-import (konfigurasi dibaca
+# saat import).
+
+def configure_environment(args, workdir: str):
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "LEDGER_BACKEND": "simulated",
+        "LEDGER_SIM_LATENCY_MS": str(args.ledger_latency_ms),
+        "LEDGER_SIM_CONFIRM_SECONDS": "0",
+        "CERTIFICATE_STORAGE_DIR": os.path.join(workdir, "objects"),
+        "PDF_CACHE_DIR": os.path.join(workdir, "pdf_cache"),
+        "ISSUER_SIGNING_KEY_FILE": os.path.join(workdir, "issuer_signing.key"),
+        "ISSUER_SIGNING_KEY_AUTOGENERATE": "true",
+        # Worker anchoring tidak ikut diukur
+        "ANCHOR_POLL_INTERVAL": "3600",
+        # Semua request datang dari satu client (TestClient)
+        "VERIFY_RATE_LIMIT": "0",
+    })
+
+
+# ==========================================================
+# MEASUREMENT
+# ==========================================================
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+
+    index = min(int(round(q / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+
+    return {
+        "count": len(values),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+        "min_ms": ms(values[0]) if values else 0.0,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else 0.0
+    }
+
+
+def measure(operation, inputs: list, concurrency: int) -> dict:
+    """Jalankan operation(input) untuk setiap input; operation return True jika sukses."""
+    def timed(item):
+        start = time.perf_counter()
+
+        try:
+            ok = operation(item)
+        except Exception as e:
+            print("BENCH ERROR:", str(e))
+            ok = False
+
+        return time.perf_counter() - start, ok
+
+    started = time.perf_counter()
+
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(timed, inputs))
+    else:
+        results = [timed(item) for item in inputs]
+
+    elapsed = time.perf_counter() - started
+
+    return summarize(
+        [latency for latency, ok in results if ok],
+        sum(1 for _, ok in results if not ok),
+        elapsed
+    )
+
+
+# ==========================================================
+# SCENARIOS
+# ==========================================================
+
+def bench_verify(client, args, rng):
+    from benchmarks.seed import certificate_hash
+
+    def payload(_):
+        if rng.random() < args.miss_ratio:
+            return "%064x" % rng.getrandbits(256)
+
+        return certificate_hash(rng.randrange(args.certificates))
+
+    hashes = [payload(i) for i in range(args.requests)]
+
+    def operation(value):
+        response = client.post("/verify", json={"certificate_hash": value})
+        return response.status_code == 200
+
+    return measure(operation, hashes, args.concurrency)
+
+
+def bench_verify_batch(client, args, rng):
+    from benchmarks.seed import certificate_hash
+
+    batches = [
+        [certificate_hash(rng.randrange(args.certificates)) for _ in range(50)]
+        for _ in range(max(args.requests // 50, 1))
+    ]
+
+    def operation(values):
+        response = client.post("/verify/batch", json={"certificate_hashes": values})
+        return response.status_code == 200
+
+    return measure(operation, batches, args.concurrency)
+
+
+def bench_generate(client, args, rng):
+    from benchmarks.seed import FIRST_NAMES, LAST_NAMES, PROGRAM_STUDI, INSTITUSI
+
+    forms = [
+        {
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "nim": str(9000000000 + rng.getrandbits(30)),
+            "program_studi": rng.choice(PROGRAM_STUDI),
+            "institusi": rng.choice(INSTITUSI)
+        }
+        for _ in range(args.generate_requests)
+    ]
+
+    def operation(form):
+        response = client.post("/generate", data=form)
+        return response.status_code == 200
+
+    return measure(operation, forms, args.concurrency)
+
+
+def bench_search(client, args, rng):
+    from benchmarks.seed import FIRST_NAMES, LAST_NAMES, PROGRAM_STUDI
+
+    terms = FIRST_NAMES + LAST_NAMES + [p.split()[-1] for p in PROGRAM_STUDI]
+    queries = [
+        rng.choice(terms) if rng.random() < 0.7 else str(2000000000 + rng.randrange(args.certificates))
+        for _ in range(args.requests // 4 or 1)
+    ]
+
+    def operation(q):
+        response = client.get("/certificates", params={"q": q})
+        return response.status_code == 200
+
+    return measure(operation, queries, args.concurrency)
+
+
+_NEXT_CURSOR = re.compile(r'cursor=([A-Za-z0-9_\-]+)&(?:amp;)?direction=next')
+
+
+def bench_paginate(client, args, rng):
+    """Telusuri halaman berurutan lewat cursor 'Berikutnya' dari halaman sebelumnya."""
+    cursor = {"value": ""}
+
+    def operation(_):
+        params = {"cursor": cursor["value"], "direction": "next"} if cursor["value"] else {}
+        response = client.get("/certificates", params=params)
+
+        match = _NEXT_CURSOR.search(response.text)
+        cursor["value"] = match.group(1) if match else ""
+
+        return response.status_code == 200
+
+    # Cursor bergantung pada halaman sebelumnya -> selalu sekuensial
+    return measure(operation, range(args.requests // 4 or 1), 1)
+
+
+def bench_render_pdf(client, args, rng):
+    from app.certificate_renderer import render_certificate_bytes
+    from benchmarks.seed import certificate_row
+
+    rows = [certificate_row(rng.randrange(args.certificates)) for _ in range(args.render_iterations)]
+
+    def operation(row):
+        return render_certificate_bytes(row).startswith(b"%PDF")
+
+    return measure(operation, rows, args.concurrency)
+
+
+BENCHMARKS = {
+    "verify": bench_verify,
+    "verify_batch": bench_verify_batch,
+    "generate": bench_generate,
+    "search": bench_search,
+    "paginate": bench_paginate,
+    "render_pdf": bench_render_pdf,
+}
+
+
+# ==========================================================
+# MAIN
+# ==========================================================
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv=None):
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    scenarios = [s for s in args.scenarios.split(",") if s]
+
+    unknown = set(scenarios) - set(BENCHMARKS)
+
+    if unknown:
+        print("Skenario tidak dikenal:", ", ".join(sorted(unknown)))
+        return 1
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="sertisah-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    configure_environment(args, workdir)
+
+    from fastapi.testclient import TestClient
+    from app.database import engine
+    from app.ledger import get_ledger
+    from app.chain_indexer import sync_once
+    from benchmarks.seed import seed_database, seed_ledger
+
+    started = time.perf_counter()
+    seed_database(engine, args.certificates)
+    seed_ledger(get_ledger(), args.certificates)
+    # Kondisi steady state: index event lokal sudah mengejar chain
+    sync_once()
+    seed_seconds = time.perf_counter() - started
+
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    results = {}
+
+    with TestClient(app) as client:
+        client.post("/login", data={"username": "bench", "password": "bench"})
+
+        for name in scenarios:
+            print(f"== {name}")
+            results[name] = BENCHMARKS[name](client, args, rng)
+            print(json.dumps(results[name]))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "certificates": args.certificates,
+            "requests": args.requests,
+            "generate_requests": args.generate_requests,
+            "render_iterations": args.render_iterations,
+            "concurrency": args.concurrency,
+            "ledger_latency_ms": args.ledger_latency_ms,
+            "miss_ratio": args.miss_ratio,
+            "seed": args.seed,
+            "seed_seconds": round(seed_seconds, 3),
+            "workdir": workdir
+        },
+        "results": results
+    }
+
+    output = args.output or os.path.join(
+        "benchmarks", "results",
+        f"{datetime.utcnow():%Y%m%dT%H%M%S}-{report['meta']['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("Hasil:", output)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
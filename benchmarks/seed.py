@@ -0,0 +1,117 @@
+import uuid
+import random
+import hashlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, insert, func
+
+
+# ==========================================================
+# SEED DATA
+# ==========================================================
+# Data sintetis deterministik: sertifikat ke-i selalu punya hash,
+# nama dan NIM yang sama, sehingga workload bisa memilih hash acak
+# tanpa menyimpan jutaan hash di memori dan hasil antar commit
+# bisa dibandingkan.
+
+FIRST_NAMES = [
+    "Budi", "Siti", "Agus", "Dewi", "Rizky", "Putri", "Andi", "Ayu",
+    "Fajar", "Nur", "Dimas", "Rina", "Bayu", "Intan", "Yoga", "Sari"
+]
+LAST_NAMES = [
+    "Santoso", "Wijaya", "Saputra", "Lestari", "Pratama", "Hidayat",
+    "Nugroho", "Kurniawan", "Permata", "Siregar", "Hasibuan", "Wibowo"
+]
+PROGRAM_STUDI = [
+    "Teknik Informatika", "Sistem Informasi", "Manajemen", "Akuntansi",
+    "Hukum", "Kedokteran", "Teknik Sipil", "Ilmu Komunikasi"
+]
+INSTITUSI = ["UCA", "UGM", "UI", "ITB", "ITS", "UNAIR", "UNPAD", "UB"]
+
+SEED_NAMESPACE = uuid.UUID("6f2f1c1e-8a43-4c1b-9a55-7d0f3b2f9e10")
+BASE_TIME = datetime(2024, 1, 1)
+
+
+def certificate_hash(i: int) -> str:
+    return hashlib.sha256(f"bench-certificate-{i}".encode()).hexdigest()
+
+
+def certificate_row(i: int) -> dict:
+    rng = random.Random(i)
+
+    return {
+        "certificate_id": str(uuid.uuid5(SEED_NAMESPACE, str(i))),
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "nim": str(2000000000 + i),
+        "program_studi": rng.choice(PROGRAM_STUDI),
+        "institusi": rng.choice(INSTITUSI),
+        "issue_date": "01 January 2024",
+        "certificate_hash": certificate_hash(i),
+        "blockchain_tx": "0x" + hashlib.sha256(f"bench-tx-{i}".encode()).hexdigest(),
+        "anchor_status": "CONFIRMED",
+        "is_revoked": i % 50 == 0,
+        "created_at": BASE_TIME + timedelta(seconds=i)
+    }
+
+
+def seeded_count(engine) -> int:
+    from app.models import Certificate
+
+    with engine.connect() as conn:
+        return conn.execute(select(func.count(Certificate.id))).scalar() or 0
+
+
+def seed_database(engine, count: int, chunk_size: int = 10000, progress=print) -> int:
+    """
+    Isi database sampai berisi `count` sertifikat benchmark. Database
+    yang sudah berisi cukup data dipakai ulang. Return jumlah baris
+    yang ditambahkan.
+    """
+    from app.models import Base, Certificate, AdminUser
+    from app.search import init_search_index
+    from app.auth import hash_password
+    from app.database import SessionLocal
+    from app.stats import rebuild_stats
+
+    Base.metadata.create_all(bind=engine)
+    init_search_index(engine)
+
+    existing = seeded_count(engine)
+
+    with engine.begin() as conn:
+        admin = conn.execute(
+            AdminUser.__table__.select().where(AdminUser.username == "bench")
+        ).first()
+
+        if not admin:
+            conn.execute(insert(AdminUser).values(
+                username="bench",
+                password_hash=hash_password("bench"),
+                role="SUPERADMIN"
+            ))
+
+    for start in range(existing, count, chunk_size):
+        end = min(start + chunk_size, count)
+
+        with engine.begin() as conn:
+            conn.execute(
+                insert(Certificate),
+                [certificate_row(i) for i in range(start, end)]
+            )
+
+        progress(f"seed {end}/{count}")
+
+    if existing < count:
+        db = SessionLocal()
+        rebuild_stats(db)
+        db.close()
+
+    return max(count - existing, 0)
+
+
+def seed_ledger(ledger, count: int, chunk_size: int = 100000):
+    """Daftarkan semua hash sertifikat seed sebagai anchored di ledger simulasi."""
+    for start in range(0, count, chunk_size):
+        ledger.seed_anchored(
+            certificate_hash(i) for i in range(start, min(start + chunk_size, count))
+        )